@@ -0,0 +1,256 @@
+"""Module for detecting weekly spikes in maintenance request volume for every
+problem type at once, used by the DGS twitterbot program to tweet alerts such
+as HVAC requests jumping after a cold snap.
+"""
+
+import os
+import pickle
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+detector_file = os.path.join(os.pardir,'data','weekly_counts.pkl')
+
+
+def weekly_count_matrix(frame, through=None):
+    """Return dense week x problem type matrix of request counts.
+
+    Parameters
+    ----------
+    frame:      pandas dataframe
+        dataframe returned from clean_data (indexed by requested date).
+
+    through:    datetime, optional
+        last date to include. Only complete weeks ending before the week of
+        this date are counted (default is today).
+
+    Returns
+    -------
+    tuple of (numpy array of counts, pandas PeriodIndex of weeks, pandas
+    Index of problem types), all empty when no requests fall before through.
+    Requests without a problem type are counted under 'NONE'.
+
+    Examples
+    --------
+    >>> counts, weeks, prob_types = weekly_count_matrix(frame=dframe)
+    """
+    through = pd.Timestamp(through or datetime.today()).to_period('W')
+    periods = frame.index.to_period('W')
+    keep = periods < through
+    periods = periods[keep]
+    if len(periods) == 0:
+        return np.zeros((0, 0), dtype=np.int64), pd.PeriodIndex([], freq='W'), pd.Index([])
+
+    type_codes, prob_types = pd.factorize(frame['prob_type'].fillna('NONE').values[keep],
+                                          sort=True)
+    first = periods.min()
+    weeks = pd.period_range(first, through - 1, freq='W')
+    week_codes = (periods.asi8 - first.ordinal)
+
+    counts = np.bincount(week_codes * len(prob_types) + type_codes,
+                         minlength=len(weeks) * len(prob_types))
+
+    return counts.reshape(len(weeks), len(prob_types)), weeks, pd.Index(prob_types)
+
+
+class SpikeDetector(object):
+    """Rolling z-score spike detector over weekly counts for all problem types.
+
+    Each week is scored against the mean and standard deviation of the
+    ``window`` weeks before it. Scores for the whole history are computed
+    with cumulative sums over the count matrix, and appending a new week only
+    scores that row against the running window.
+
+    Parameters
+    ----------
+    counts:     numpy array
+        week x problem type matrix from weekly_count_matrix.
+
+    weeks:      pandas PeriodIndex
+        weeks of the matrix rows.
+
+    prob_types: pandas Index
+        problem types of the matrix columns.
+
+    window:     int
+        number of previous weeks forming the baseline (default 8).
+
+    Examples
+    --------
+    >>> detector = SpikeDetector(*weekly_count_matrix(dframe))
+    >>> detector.spikes(threshold=3)
+    """
+
+    def __init__(self, counts, weeks, prob_types, window=8):
+        self.counts = np.asarray(counts, dtype=float)
+        self.weeks = weeks
+        self.prob_types = pd.Index(prob_types)
+        self.window = window
+
+    def _baseline(self):
+        """Return rolling mean and std of the previous window weeks for each week."""
+        padded = np.vstack([np.zeros((1, self.counts.shape[1])), self.counts])
+        sums = np.cumsum(padded, axis=0)
+        squares = np.cumsum(padded ** 2, axis=0)
+
+        # baseline of week i covers weeks i-window .. i-1
+        end = np.arange(len(self.counts))
+        start = end - self.window
+        valid = start >= 0
+        start = np.clip(start, 0, None)
+
+        mean = (sums[end] - sums[start]) / self.window
+        variance = (squares[end] - squares[start]) / self.window - mean ** 2
+        std = np.sqrt(np.clip(variance, 0, None))
+        mean[~valid] = np.nan
+
+        return mean, std
+
+    def zscores(self):
+        """Return week x problem type matrix of z-scores (nan for the first weeks)."""
+        mean, std = self._baseline()
+
+        # floor the deviation so rare problem types don't flag on single requests
+        return (self.counts - mean) / np.maximum(std, 1)
+
+    def append_week(self, week_counts, week=None):
+        """Add the counts of a new week and return its z-scores.
+
+        Parameters
+        ----------
+        week_counts:    pandas series
+            request counts indexed by problem type for the new week.
+
+        week:           pandas Period, optional
+            week of the counts (default is the week after the last one).
+
+        Returns
+        -------
+        pandas series of z-scores indexed by problem type
+        """
+        new_types = week_counts.index.difference(self.prob_types)
+        if len(new_types) > 0:
+            self.prob_types = self.prob_types.append(new_types)
+            self.counts = np.hstack([self.counts,
+                                     np.zeros((len(self.counts), len(new_types)))])
+
+        row = week_counts.reindex(self.prob_types, fill_value=0).values.astype(float)
+        baseline = self.counts[-self.window:]
+        mean = baseline.mean(axis=0)
+        std = np.maximum(baseline.std(axis=0), 1)
+
+        self.counts = np.vstack([self.counts, row])
+        self.weeks = self.weeks.append(pd.PeriodIndex(
+            [week if week is not None else self.weeks[-1] + 1], freq='W'))
+
+        scores = (row - mean) / std
+        if len(baseline) < self.window:
+            scores[:] = np.nan
+
+        return pd.Series(scores, index=self.prob_types)
+
+    def spikes(self, threshold=3, min_count=5, weeks_back=1):
+        """Return problem types whose weekly count spiked in the latest weeks.
+
+        Parameters
+        ----------
+        threshold:  float
+            minimum z-score to flag (default 3).
+
+        min_count:  int
+            minimum requests in the week to flag (default 5).
+
+        weeks_back: int
+            number of most recent weeks to check (default 1).
+
+        Returns
+        -------
+        pandas dataframe with week, prob_type, requests, baseline and zscore
+        columns sorted by zscore. Requests without a problem type ('NONE')
+        are never flagged.
+        """
+        mean, std = self._baseline()
+        mean, std = mean[-weeks_back:], std[-weeks_back:]
+        counts = self.counts[-weeks_back:]
+        scores = (counts - mean) / np.maximum(std, 1)
+        with np.errstate(invalid='ignore'):
+            rows, cols = np.nonzero((scores >= threshold) & (counts >= min_count))
+
+        flagged = pd.DataFrame({
+            'week': self.weeks[-weeks_back:][rows],
+            'prob_type': self.prob_types[cols],
+            'requests': counts[rows, cols].astype(int),
+            'baseline': mean[rows, cols].round(1),
+            'zscore': scores[rows, cols].round(1)})
+        flagged = flagged[flagged['prob_type'] != 'NONE']
+
+        return flagged.sort_values('zscore', ascending=False).reset_index(drop=True)
+
+
+def update_detector(frame, file=detector_file, through=None, window=8):
+    """Append the complete weeks since the last run to the persisted detector.
+
+    The week x problem type count matrix is built from the whole frame only
+    on the first run; later runs count just the new complete weeks and add
+    them with SpikeDetector.append_week. Requests added late for weeks
+    already appended aren't recounted.
+
+    Parameters
+    ----------
+    frame:      pandas dataframe
+        dataframe returned from clean_data (sorted by requested date).
+
+    file:       str
+        pickle file the detector is persisted to between runs.
+
+    through:    datetime, optional
+        only complete weeks before the week of this date are counted
+        (default is today).
+
+    window:     int
+        number of previous weeks forming the baseline of a new detector.
+
+    Returns
+    -------
+    SpikeDetector
+
+    Examples
+    --------
+    >>> spike_message(spikes=update_detector(frame=dframe).spikes())
+    """
+    detector = None
+    if os.path.isfile(file):
+        with open(file, 'rb') as f:
+            detector = pickle.load(f)
+
+    if detector is None or len(detector.weeks) == 0:
+        detector = SpikeDetector(*weekly_count_matrix(frame, through=through), window=window)
+    else:
+        last = pd.Timestamp(through or datetime.today()).to_period('W') - 1
+        for week in pd.period_range(detector.weeks[-1] + 1, last, freq='W'):
+            rows = frame.loc[week.start_time:week.end_time]
+            detector.append_week(rows['prob_type'].fillna('NONE').value_counts(), week=week)
+
+    with open(file, 'wb') as f:
+        pickle.dump(detector, f)
+
+    return detector
+
+
+def spike_message(spikes, max_items=3):
+    """Return tweet text announcing flagged spikes, or None if no spikes.
+
+    Examples
+    --------
+    >>> spike_message(spikes=detector.spikes())
+    """
+    if len(spikes) == 0:
+        return None
+
+    lines = ['{}: {} requests ({:+.1f} sd)'.format(row.prob_type.title(),
+                                                  row.requests, row.zscore)
+             for row in spikes.head(max_items).itertuples()]
+
+    return 'Spike in maintenance requests the week of {}\n{}'.format(
+        spikes['week'].iloc[0].start_time.strftime('%m-%d-%Y'), '\n'.join(lines))
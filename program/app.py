@@ -2,9 +2,18 @@ import os, sys
 import shutil
 from datetime import datetime
 
-from chart_generate import topn_requests_donut, yearoveryear_reqeusts_volume, delete_directory
+from anomaly import spike_message, update_detector
+from backlog import update_backlog
+from chart_generate import (topn_requests_donut, yearoveryear_reqeusts_volume,
+                            animated_yearoveryear_volume, duration_sla_chart,
+                            hotspot_map, open_backlog_chart, delete_directory)
 from data_fetch import data as dframe
-from tweet_generate import api, tweet
+from duration_sketch import update_sketches
+from profiling import stage
+from rollup import update_rollup
+from spatial import BuildingIndex, hotspot_message, hotspots
+from transport import latency_summary
+from tweet_generate import api, post_tweet, tweet
 
 
 ## create directory to store program logs
@@ -18,17 +27,51 @@ pprint_module_name = ((str(module).split('from')[1]).replace('>',''))
 
 image_folder = os.path.join(os.pardir,'data','images')
 image_files = []
-image_files.append(yearoveryear_reqeusts_volume(dframe))    
+with stage('update_rollup'):
+    rollup = update_rollup(dframe)
+with stage('yearoveryear_reqeusts_volume'):
+    image_files.append(yearoveryear_reqeusts_volume(rollup))    
 for prd in ['year','week']:
-    image_files.append(topn_requests_donut(dframe, period=prd))
+    with stage('topn_requests_donut_{}'.format(prd)):
+        image_files.append(topn_requests_donut(rollup, period=prd))
+with stage('update_sketches'):
+    sketches = update_sketches(dframe)
+with stage('duration_sla_chart'):
+    image_files.append(duration_sla_chart(sketches[('prob_type',)]))
+with stage('spike_detection'):
+    spike_alert = spike_message(update_detector(dframe).spikes())
+with stage('hotspots'):
+    building_index = BuildingIndex.from_frame(dframe)
+    request_hotspots = hotspots(dframe, building_index)
+    hotspot_alert = hotspot_message(request_hotspots)
+with stage('hotspot_map'):
+    hotspot_file = (hotspot_map(building_index, request_hotspots)
+                    if hotspot_alert is not None else None)
+with stage('update_backlog'):
+    open_backlog = update_backlog(dframe).series()
+with stage('open_backlog_chart'):
+    backlog_file = open_backlog_chart(open_backlog)
+with stage('animated_yearoveryear_volume'):
+    animation_file = animated_yearoveryear_volume(dframe)
 
 
 def run_program():
     tweet(api_object=api, files=image_files, msg=timestamp)
+    ## gifs & videos can't share a tweet with images -- send separately
+    if animation_file is not None:
+        tweet(api_object=api, files=[animation_file],
+              msg='Weekly request volume, year over year -- {}'.format(timestamp))
+    tweet(api_object=api, files=[backlog_file],
+          msg='Open maintenance work orders by problem type -- {}'.format(timestamp))
+    if spike_alert is not None:
+        post_tweet(tweepy_api=api, message=spike_alert)
+    if hotspot_alert is not None:
+        tweet(api_object=api, files=[hotspot_file], msg=hotspot_alert)
     delete_directory(image_folder)
     shutil.move('execution.log',  os.path.join('logs','execution.log'))
 
     print('{} run sucessfully'.format(pprint_module_name))
+    print('request latency by host: {}'.format(latency_summary()))
     
     
 ## tweet charts & remove images folder after sent
@@ -0,0 +1,173 @@
+"""Module for rendering the archive of weekly charts for past weeks of the DGS
+twitterbot program. Request counts for every week are aggregated in a single
+pass over the data and the charts are rendered in parallel, as they would
+have looked at the end of each week.
+
+    python backfill.py --start 2014-01-01 --processes 8 --dry-run
+"""
+
+import argparse
+import os
+from datetime import datetime
+from multiprocessing import Pool
+
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+
+from chart_generate import render_donut, render_yearoveryear
+from rollup import RollupStore
+
+archive_folder = os.path.join(os.pardir,'data','archive')
+
+
+def weekly_table(df):
+    """Return request counts by year, iso week, calendar week and problem type.
+
+    This is the only pass over the work order rows; every chart of every
+    week in the backfill is computed from this (much smaller) table.
+
+    Parameters
+    ----------
+    df:     pandas dataframe or rollup.RollupStore
+        dataframe returned from clean_data, or the weekly rollup store
+        which already holds these counts.
+
+    Returns
+    -------
+    pandas dataframe with year, week, period, prob_type and requests columns,
+    requests without a problem type are counted under 'NONE' as in the rollup.
+    """
+    if isinstance(df, RollupStore):
+        return (df.table(by=['year', 'week', 'period', 'prob_type'])
+                [['year', 'week', 'period', 'prob_type', 'requests']])
+
+    return (df.groupby([df['year'].values, df.index.isocalendar().week.values.astype(int),
+                        df.index.to_period('W'), df['prob_type'].fillna('NONE').values])
+              .size()
+              .rename_axis(['year', 'week', 'period', 'prob_type'])
+              .reset_index(name='requests'))
+
+
+def week_charts(table, period, topn=20, folder=archive_folder):
+    """Return render tasks for the charts of one week from the weekly table.
+
+    Counts match what topn_requests_donut and yearoveryear_reqeusts_volume
+    return when called with ``as_of`` set to the end of the week.
+
+    Returns
+    -------
+    list of (render function, keyword arguments) tuples.
+    """
+    as_of = period.end_time.to_pydatetime()
+    current_year = as_of.year
+    current_week = int(as_of.strftime('%W'))
+    known = table[table['period'] <= period]
+
+    current_year_data = (known[known['year'] == current_year]
+                         .groupby('week')['requests'].sum())
+    last_year_data = (known[known['year'] == current_year - 1]
+                      .groupby('week')['requests'].sum())
+
+    this_year = known[(known['year'] == current_year) &
+                      ~known['prob_type'].isin(['OTHER', 'NONE'])]
+    tasks = [(render_yearoveryear, {'current_year_data': current_year_data,
+                                    'last_year_data': last_year_data,
+                                    'as_of': as_of, 'folder': folder})]
+
+    for prd, rows in [('year', this_year),
+                      ('week', this_year[this_year['week'] >= current_week - 2])]:
+        counts = (rows.groupby('prob_type')['requests'].sum()
+                  .sort_values(ascending=False, kind='mergesort')
+                  .head(topn))
+        tasks.append((render_donut, {'labels': counts.index, 'values': counts.values,
+                                     'period': prd, 'topn': topn, 'as_of': as_of,
+                                     'folder': folder}))
+
+    return tasks
+
+
+def _render(task):
+    func, kwargs = task
+    return kwargs['as_of'], func(**kwargs)
+
+
+def backfill(df, start='2014-01-01', end=None, folder=archive_folder,
+             processes=None, sink=None):
+    """Render the weekly charts for every week between start and end.
+
+    Parameters
+    ----------
+    df:         pandas dataframe or rollup.RollupStore
+        dataframe returned from clean_data or the weekly rollup store.
+
+    start:      str or datetime
+        first week to render (default is 2014-01-01, the first year kept
+        by clean_data).
+
+    end:        str or datetime, optional
+        last week to render (default is the last complete week).
+
+    folder:     str
+        folder the charts are saved to (default is data/archive).
+
+    processes:  int, optional
+        number of worker processes (default is the number of cpus).
+
+    sink:       tweepy.api.API or FakeTweetSink, optional
+        when passed, each week's charts are sent with tweet() to it.
+
+    Returns
+    -------
+    dict of chart filenames keyed by the end of week date.
+
+    Examples
+    --------
+    >>> backfill(df=dframe, start='2018-01-01', sink=FakeTweetSink())
+    """
+    end = pd.Timestamp(end or datetime.today()).to_period('W')
+    if end.end_time > datetime.today():
+        end -= 1
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    table = weekly_table(df)
+    tasks = [task for period in pd.period_range(start, end, freq='W')
+             for task in week_charts(table, period, folder=folder)]
+
+    charts = {}
+    with Pool(processes=processes) as pool:
+        for as_of, fname in pool.imap_unordered(_render, tasks, chunksize=8):
+            charts.setdefault(as_of, []).append(fname)
+
+    if sink is not None:
+        from tweet_generate import tweet
+        for as_of in sorted(charts):
+            tweet(api_object=sink, files=sorted(charts[as_of]),
+                  msg=as_of.strftime('%A %B %d,%Y'))
+
+    return charts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render weekly charts for past weeks.')
+    parser.add_argument('--start', default='2014-01-01')
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--dry-run', action='store_true',
+                        help='record a tweet per week in the local fake tweet sink')
+    parser.add_argument('--from-rollup', action='store_true',
+                        help='read counts from the persisted weekly rollup instead of fetching')
+    args = parser.parse_args()
+
+    if args.from_rollup:
+        dframe = RollupStore.load()
+    else:
+        from data_fetch import data as dframe
+    from tweet_generate import FakeTweetSink
+
+    charts = backfill(dframe, start=args.start, end=args.end,
+                      processes=args.processes,
+                      sink=FakeTweetSink(folder=archive_folder) if args.dry_run else None)
+    print('rendered {} charts for {} weeks'.format(
+        sum(len(files) for files in charts.values()), len(charts)))
@@ -0,0 +1,223 @@
+"""Module for the open work order backlog of the DGS twitterbot program. Each
+work order is an interval from its requested date to its completed (or
+closed) date, and the number of open orders per day is computed for every
+problem type at once with an event sweep: +1 on the requested day, -1 on the
+day it's completed and a cumulative sum over the days.
+"""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+backlog_file = os.path.join(os.pardir,'data','open_backlog.pkl')
+
+
+def intervals(frame, by='prob_type'):
+    """Return the open interval (requested day, completed day) of each work order.
+
+    Parameters
+    ----------
+    frame:  pandas dataframe
+        rows of the dataframe returned from clean_data.
+
+    by:     str
+        column the backlog is split by.
+
+    Returns
+    -------
+    pandas dataframe indexed by wo_id with group, start and end columns,
+    end is NaT for work orders still open.
+    """
+    start = frame.index.normalize()
+    end = pd.DatetimeIndex(frame['completed'].fillna(frame['closed'])).normalize()
+    # completions recorded before the request count as same day work
+    end = end.where(end.isnull() | (end >= start), start)
+    orders = pd.DataFrame({'group': frame[by].fillna('NONE').values,
+                           'start': start, 'end': end},
+                          index=pd.Index(frame['wo_id'].values, name='wo_id'))
+
+    return orders[~orders.index.duplicated(keep='last')]
+
+
+class BacklogEngine(object):
+    """Daily open work order counts per group maintained from +1/-1 events.
+
+    A work order counts as open at the end of each day from its requested
+    day up to (not including) the day it's completed. Events are kept in a
+    dense day x group matrix, so the whole series is one cumulative sum and
+    closing or reopening an order only moves its -1 event.
+
+    Parameters
+    ----------
+    by:     str
+        column of the cleaned dataframe to split the backlog by
+        (default 'prob_type').
+
+    origin: str or datetime
+        first day of the series (default 2014-01-01, the first year kept
+        by clean_data).
+
+    Examples
+    --------
+    >>> engine = BacklogEngine.load()
+    >>> engine.apply(dframe)
+    >>> engine.series().sum(axis=1)   # total open work orders per day
+    """
+
+    def __init__(self, by='prob_type', origin='2014-01-01'):
+        self.by = by
+        self.origin = pd.Timestamp(origin)
+        self.groups = pd.Index([])
+        self.deltas = np.zeros((0, 0), dtype=np.int64)
+        self.orders = pd.DataFrame(columns=['group', 'start', 'end'],
+                                   index=pd.Index([], name='wo_id'))
+
+    @classmethod
+    def load(cls, file=backlog_file):
+        """Load the persisted engine or start an empty one."""
+        if os.path.isfile(file):
+            with open(file, 'rb') as f:
+                return pickle.load(f)
+        return cls()
+
+    def save(self, file=backlog_file):
+        with open(file, 'wb') as f:
+            pickle.dump(self, f)
+
+    def _intervals(self, frame):
+        """Return intervals of frame with dates past tomorrow clipped to it.
+
+        A mistyped future date (e.g. completed in 2919) would otherwise grow
+        the event matrix by a row per day up to it. The clipped dates are
+        what's stored, so taking events back always hits the same days, and
+        changed() picks such orders up again as the days go by.
+        """
+        orders = intervals(frame, by=self.by)
+        limit = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        for col in ['start', 'end']:
+            orders[col] = orders[col].mask(orders[col] > limit, limit)
+        return orders
+
+    def _day(self, dates):
+        return np.maximum((pd.DatetimeIndex(dates) - self.origin).days.values, 0)
+
+    def _ensure(self, days, groups):
+        """Grow the event matrix to hold the given last day and groups."""
+        new_groups = pd.Index(groups).unique().difference(self.groups)
+        if len(new_groups) > 0:
+            self.groups = self.groups.append(new_groups)
+        rows = max(days + 1, self.deltas.shape[0])
+        if (rows, len(self.groups)) != self.deltas.shape:
+            grown = np.zeros((rows, len(self.groups)), dtype=np.int64)
+            grown[:self.deltas.shape[0], :self.deltas.shape[1]] = self.deltas
+            self.deltas = grown
+
+    def _events(self, orders, sign):
+        """Add (sign=1) or take back (sign=-1) the events of work orders."""
+        if len(orders) == 0:
+            return
+        start = self._day(orders['start'])
+        closed = orders['end'].notnull().values
+        end = self._day(orders['end'][closed])
+        last = max(start.max(), end.max() if len(end) else 0,
+                   (pd.Timestamp.today().normalize() - self.origin).days)
+        self._ensure(last, orders['group'])
+
+        codes = self.groups.get_indexer(orders['group'])
+        np.add.at(self.deltas, (start, codes), sign)
+        np.add.at(self.deltas, (end, codes[closed]), -sign)
+
+    def apply(self, frame):
+        """Apply new, closed or reopened work orders to the backlog.
+
+        Parameters
+        ----------
+        frame:  pandas dataframe
+            new or changed rows of the dataframe returned from clean_data.
+
+        Returns
+        -------
+        int: number of work orders applied.
+        """
+        new = self._intervals(frame)
+        old = self.orders.loc[self.orders.index.intersection(new.index)]
+        self._events(old, -1)
+        self._events(new, 1)
+        self.orders = pd.concat([self.orders.drop(old.index), new])
+
+        return len(new)
+
+    def changed(self, frame):
+        """Return the rows of frame that are new, closed or reopened since last applied.
+
+        This is the fallback for a full fetch: every row of frame is compared
+        with the stored intervals, so its cost grows with the history. When
+        only new and changed rows are fetched, pass them to apply directly.
+        """
+        new = self._intervals(frame)
+        old = self.orders.reindex(new.index)
+        same = ((new['group'] == old['group']) & (new['start'] == old['start']) &
+                ((new['end'] == old['end']) | (new['end'].isnull() & old['end'].isnull())))
+        return frame[frame['wo_id'].isin(new.index[~same.values])]
+
+    def close(self, wo_ids, dates):
+        """Record completion dates for open work orders already applied."""
+        changed = self.orders.loc[pd.Index(wo_ids)].copy()
+        self._events(changed, -1)
+        end = pd.DatetimeIndex(dates).normalize()
+        start = pd.DatetimeIndex(changed['start'])
+        limit = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        changed['end'] = end.where(end >= start, start).where(end <= limit, limit)
+        self._events(changed, 1)
+        self.orders.loc[changed.index, 'end'] = changed['end']
+
+    def series(self, start=None, end=None):
+        """Return open work orders at the end of each day per group.
+
+        Parameters
+        ----------
+        start:  str or datetime, optional
+            first day of the series (default is the origin).
+
+        end:    str or datetime, optional
+            last day of the series (default is today).
+
+        Returns
+        -------
+        pandas dataframe indexed by day with one column per group.
+        """
+        backlog = pd.DataFrame(np.cumsum(self.deltas, axis=0),
+                               index=pd.date_range(self.origin, periods=len(self.deltas)),
+                               columns=self.groups)
+
+        return backlog.loc[start:end or pd.Timestamp.today().normalize()]
+
+
+def update_backlog(frame, file=backlog_file, full=True):
+    """Apply new, closed and reopened work orders to the persisted backlog engine.
+
+    Parameters
+    ----------
+    frame:  pandas dataframe
+        dataframe returned from clean_data.
+
+    file:   str
+        pickle file the engine is persisted to between runs.
+
+    full:   bool
+        frame is the full dataset (default True, as data_fetch downloads the
+        whole table) and changed rows are found with BacklogEngine.changed,
+        which scans the whole history. With full=False frame holds only new
+        and changed rows and is applied directly.
+
+    Examples
+    --------
+    >>> backlog = update_backlog(frame=dframe).series()
+    """
+    engine = BacklogEngine.load(file=file)
+    engine.apply(engine.changed(frame) if full else frame)
+    engine.save(file=file)
+
+    return engine
@@ -7,15 +7,22 @@ import inspect
 import logging
 import os
 import shutil
+import subprocess
 import sys
 from datetime import datetime
 
 import matplotlib.colors
 import matplotlib.cm as colormap
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
 import numpy as np
+import pandas as pd
 import seaborn as sns
 
+from rollup import RollupStore
+
 sns.set_style(style='ticks')
 
 logfile = 'execution.log'
@@ -92,13 +99,14 @@ image_folder = os.path.join(os.pardir,'data','images')
 ## donut chart of request volume by problem type
 ## visualize the top n problem types by category 
 ## with options for viewing top n this week vs this year
-def topn_requests_donut(df, period, topn=20):
+def topn_requests_donut(df, period, topn=20, as_of=None, folder=image_folder):
     """Create donut chart of top 20 problem types by reqeust volume.
 
     Parameters
     ----------
-    df:       pandas dataframe
-        final datafame containing data for generating tweets
+    df:       pandas dataframe or rollup.RollupStore
+        final datafame containing data for generating tweets, or the
+        weekly rollup store to read request counts from
 
     topn:     int
         number of problem types to return in search. the top n number
@@ -108,6 +116,13 @@ def topn_requests_donut(df, period, topn=20):
         timeframe for piechart. Sets data filter to current year only
         or current week.  Options include 'year' (default) and 'week'.
 
+    as_of:    datetime, optional
+        date the chart is rendered for. Requests after this date are left
+        out and the year, week and filename stamp follow it (default is today).
+
+    folder:   str, optional
+        folder the chart image is saved to (default is data/images).
+
     Returns
     -------
     String: filename of chart image.
@@ -118,24 +133,82 @@ def topn_requests_donut(df, period, topn=20):
 
     >>> topn_requests_donut(df=dataframe, period='week', topn=10)
 
+    >>> topn_requests_donut(df=dataframe, period='week', as_of=datetime(2016,3,6))
+
     """
-    current_year = datetime.today().strftime('%Y')
-    current_week = datetime.today().strftime('%W')
+    as_of = as_of or datetime.today()
+    current_year = as_of.strftime('%Y')
+    current_week = as_of.strftime('%W')
+
+    if isinstance(df, RollupStore):
+        ## read counts from the weekly rollup (known through the as_of week)
+        table = df.table(by=['year','week','period','prob_type'],
+                         years=[int(current_year)])
+        ## 'NONE' holds requests without a problem type, left out like nulls below
+        table = table[~table['prob_type'].isin(['OTHER', 'NONE']) &
+                      (table['period'] <= pd.Timestamp(as_of).to_period('W'))]
+        if period == 'week':
+            table = table[table['week'] >= int(current_week) - 2]
+        counts = (table.groupby('prob_type')['requests'].sum()
+                  .sort_values(ascending=False, kind='mergesort')
+                  .head(topn))
+        labels, values = counts.index, counts.values
 
-    if period == 'year':
-        dframe = df[(df['prob_type'] != 'OTHER') &
-                    (df['year'] == int(current_year))]
+    else:
+        if period == 'year':
+            dframe = df[(df['prob_type'] != 'OTHER') &
+                        (df['year'] == int(current_year)) &
+                        (df.index <= as_of)]
+
+        elif period == 'week':
+            dframe = df[(df['prob_type'] != 'OTHER') &
+                    (df['year'] == int(current_year)) &
+                    (df.index.week >= int(current_week) - 2) &
+                    (df.index <= as_of)]
+        else:
+            # pass condition generates error forcing 'year' or 'week' as arguments
+            pass
+
+        labels = dframe['prob_type'].value_counts().head(topn).index
+        values = dframe['prob_type'].value_counts().head(topn).values
+
+    full_fname = render_donut(labels=labels, values=values, period=period,
+                              topn=topn, as_of=as_of, folder=folder)
 
-    elif period == 'week':
-        dframe = df[(df['prob_type'] != 'OTHER') &
-                (df['year'] == int(current_year)) &
-                (df.index.week >= int(current_week) - 2)]
+    if os.path.isfile(full_fname): 
+        status = 'Pass'
     else:
-        # pass condition generates error forcing 'year' or 'week' as arguments
-        pass
+        status = 'Fail'
+        
+    ## Event logging 
+    obj = inspect.currentframe()
+    frame = inspect.getframeinfo(obj)
+    
+    logging.basicConfig(
+        filename=logfile,
+        format='%(asctime)s ::: **%(levelname)s** %(message)s', datefmt='%Y-%m-%d %I:%M:%S')
+    
+    logger = logging.getLogger(frame.function)
+    logger.setLevel(logging.DEBUG)
+    log_message = ('MODULE:: {} FUNCTION:: {} STATUS::   {}'
+                   .format(frame.filename,frame.function,status))
+    logger.debug(log_message)
+    
+    return full_fname
+
 
-    labels = dframe['prob_type'].value_counts().head(topn).index
-    values = dframe['prob_type'].value_counts().head(topn).values
+def render_donut(labels, values, period, topn, as_of, folder=image_folder):
+    """Draw and save the donut chart for precomputed problem type counts.
+
+    Used by topn_requests_donut and by the backfill, which computes the
+    counts for every week in one pass and renders the charts in parallel.
+
+    Returns
+    -------
+    String: filename of chart image.
+    """
+    current_year = as_of.strftime('%Y')
+    current_week = as_of.strftime('%W')
     cmap = plt.cm.summer_r  # set colorscale for chart
 
     ## set a default max and min value to 
@@ -169,9 +242,9 @@ def topn_requests_donut(df, period, topn=20):
     plt.setp(title_object, fontweight='bold')
 
     ## save chart image and return png file
-    stamp = datetime.today().strftime('%m-%d-%Y')
-    if not os.path.exists(image_folder):
-        os.mkdir(image_folder)
+    stamp = as_of.strftime('%m-%d-%Y')
+    if not os.path.exists(folder):
+        os.mkdir(folder)
         
     if period == 'year':
         base_fname = ('{} top{}_requests{}.png'
@@ -182,15 +255,78 @@ def topn_requests_donut(df, period, topn=20):
     else:
         pass # this could be improved to a log error or warning 
     
-    full_fname = os.path.join(image_folder, base_fname)
-    image = pie.savefig(fname=full_fname)
-    
-        
-    if os.path.isfile(full_fname): 
+    full_fname = os.path.join(folder, base_fname)
+    pie.savefig(fname=full_fname)
+    plt.close(pie)
+
+    return full_fname
+
+
+## bar & line graph providing a point in time comparison
+## of weekly maintenance reqeust volume and helps to 
+## visualize answers to the question: 'this time last year vs 
+## right now how many more or less request did we have?' 
+def yearoveryear_reqeusts_volume(df, as_of=None, folder=image_folder):
+    """
+    Create chart with 2 traces showing year over year comparison of weekly
+    work requests for current (line chart) and previous year (bars).
+
+    Parameters
+    ----------
+    df:       pandas dataframe or rollup.RollupStore
+        final datafame containing data for generating tweets, or the
+        weekly rollup store to read request counts from
+
+    as_of:    datetime, optional
+        date the chart is rendered for. Requests after this date are left
+        out and the years and filename stamp follow it (default is today).
+
+    folder:   str, optional
+        folder the chart image is saved to (default is data/images).
+
+    Returns
+    -------
+    String: filename of chart image.
+
+    Examples
+    --------
+    >>> yearoveryear_reqeusts_volume(df=dataframe)
+
+    >>> yearoveryear_reqeusts_volume(df=dataframe, as_of=datetime(2016,3,6))
+
+    """
+    as_of = as_of or datetime.today()
+    current_year = int(as_of.strftime('%Y'))
+    last_year = current_year - 1
+
+    if isinstance(df, RollupStore):
+        ## read counts from the weekly rollup (known through the as_of week)
+        table = df.table(by=['year','week','period'], years=[last_year, current_year])
+        table = table[table['period'] <= pd.Timestamp(as_of).to_period('W')]
+        current_year_data = (table[table['year'] == current_year]
+                             .groupby('week')['requests'].sum())
+        last_year_data = (table[table['year'] == last_year]
+                          .groupby('week')['requests'].sum())
+
+    else:
+        df = df[df.index <= as_of]
+
+        current_year_data = (df[df['year'] == current_year]
+                             .groupby(df[df['year'] == current_year].index.week)
+                             ['wo_id'].count())
+        last_year_data = (df[df['year'] == last_year]
+                          .groupby(df[df['year'] == last_year].index.week)
+                          ['wo_id'].count())
+
+    full_fname = render_yearoveryear(current_year_data=current_year_data,
+                                     last_year_data=last_year_data,
+                                     as_of=as_of, folder=folder)
+
+    if os.path.isfile(full_fname):
         status = 'Pass'
     else:
         status = 'Fail'
-        
+    
     ## Event logging 
     obj = inspect.currentframe()
     frame = inspect.getframeinfo(obj)
@@ -208,41 +344,19 @@ def topn_requests_donut(df, period, topn=20):
     return full_fname
 
 
-## bar & line graph providing a point in time comparison
-## of weekly maintenance reqeust volume and helps to 
-## visualize answers to the question: 'this time last year vs 
-## right now how many more or less request did we have?' 
-def yearoveryear_reqeusts_volume(df):
-    """
-    Create chart with 2 traces showing year over year comparison of weekly
-    work requests for current (line chart) and previous year (bars).
-
-    Parameters
-    ----------
-    df:       pandas dataframe
-        final datafame containing data for generating tweets
+def render_yearoveryear(current_year_data, last_year_data, as_of, folder=image_folder):
+    """Draw and save the year over year chart for precomputed weekly counts.
 
+    Used by yearoveryear_reqeusts_volume and by the backfill, which computes
+    the counts for every week in one pass and renders the charts in parallel.
 
     Returns
     -------
     String: filename of chart image.
-
-    Examples
-    --------
-    >>> yearoveryear_reqeusts_volume(df=dataframe)
-
     """
-    
-    current_year = int(datetime.today().strftime('%Y'))
+    current_year = int(as_of.strftime('%Y'))
     last_year = current_year - 1
-    runtime_stamp = datetime.today().strftime('%m-%d-%Y')
-
-    current_year_data = (df[df['year'] == current_year]
-                         .groupby(df[df['year'] == current_year].index.week)
-                         ['wo_id'].count())
-    last_year_data = (df[df['year'] == last_year]
-                      .groupby(df[df['year'] == last_year].index.week)
-                      ['wo_id'].count())
+    runtime_stamp = as_of.strftime('%m-%d-%Y')
 
     densely_dashdot_linestyle = (0, (3, 1, 1, 1, 1, 1))
     fig, ax = plt.subplots(figsize=(11,6))
@@ -250,14 +364,18 @@ def yearoveryear_reqeusts_volume(df):
     ## plot current year data as line chart to visualize
     ## the number of request per week through 
     ## the current week at run time
-    current_year_data.plot(color='#31a354',linewidth=3.5,
-                           linestyle=densely_dashdot_linestyle,
-                           label=current_year);
+    ## (either year can be empty, e.g. the first week of january or
+    ## 2014 in the backfill which has no previous year of data)
+    if len(current_year_data) > 0:
+        current_year_data.plot(color='#31a354',linewidth=3.5,
+                               linestyle=densely_dashdot_linestyle,
+                               label=current_year);
 
     ## plot the last year data of requests per week as bar
     ## chart to communicate the workload last year and provide
     ## easy visual comparison for point in time request workload
-    last_year_data.plot(kind='bar', color='#a1d99b',width=.5, label=last_year)
+    if len(last_year_data) > 0:
+        last_year_data.plot(kind='bar', color='#a1d99b',width=.5, label=last_year)
 
     sns.despine(offset=10,)
     plt.xlabel('52 weeks of calendar year')
@@ -274,30 +392,436 @@ def yearoveryear_reqeusts_volume(df):
     
     ## create a data/images folder if one doesn't exist
     ## save the chart image to images folder 
-    if not os.path.exists(image_folder):
-        os.mkdir(image_folder)
+    if not os.path.exists(folder):
+        os.mkdir(folder)
                 
     base_fname = ('{} weekly_volume_comparision.png'.format(runtime_stamp))
-    full_fname = os.path.join(image_folder, base_fname)
+    full_fname = os.path.join(folder, base_fname)
     fig.savefig(full_fname)
-    
+    plt.close(fig)
+
+    return full_fname
+
+## animated version of the year over year comparison that
+## builds the chart one week at a time. frames are blitted
+## (only the new bar and the current year line are redrawn)
+## and piped straight to ffmpeg so no frames are held in memory
+def animated_yearoveryear_volume(df, fmt='gif', fps=6, as_of=None, folder=image_folder):
+    """
+    Create animation of the year over year comparison of weekly work requests
+    that adds one week per frame for the current (line) and previous year (bars).
+
+    Parameters
+    ----------
+    df:       pandas dataframe
+        final datafame containing data for generating tweets
+
+    fmt:      str
+        animation file format. Options include 'gif' (default) and 'mp4'.
+
+    fps:      int
+        frames (weeks) per second of the animation.
+
+    as_of:    datetime, optional
+        date the animation is rendered for (default is today).
+
+    folder:   str, optional
+        folder the animation is saved to (default is data/images).
+
+    Returns
+    -------
+    String: filename of animation or None if ffmpeg is not available or
+    fails to encode it.
+
+    Examples
+    --------
+    >>> animated_yearoveryear_volume(df=dataframe)
+
+    >>> animated_yearoveryear_volume(df=dataframe, fmt='mp4', fps=10)
+
+    """
+    as_of = as_of or datetime.today()
+    current_year = int(as_of.strftime('%Y'))
+    last_year = current_year - 1
+    runtime_stamp = as_of.strftime('%m-%d-%Y')
+    weeks = np.arange(1, 54)
+    df = df[df.index <= as_of]
+
+    this_year, previous_year = df[df['year'] == current_year], df[df['year'] == last_year]
+    current_year_data = (this_year
+                         .groupby(this_year.index.isocalendar().week.values.astype(int))
+                         ['wo_id'].count())
+    last_year_data = (previous_year
+                      .groupby(previous_year.index.isocalendar().week.values.astype(int))
+                      ['wo_id'].count())
+    current_counts = current_year_data.reindex(weeks).values
+    last_counts = last_year_data.reindex(weeks, fill_value=0).values
+
+    densely_dashdot_linestyle = (0, (3, 1, 1, 1, 1, 1))
+    fig, ax = plt.subplots(figsize=(11,6))
+    fig.set_canvas(FigureCanvasAgg(fig))
+
+    ## animated artists are left out of the static background and are
+    ## only drawn explicitly with draw_artist when they change
+    bars = ax.bar(weeks, np.zeros(len(weeks)), color='#a1d99b', width=.5,
+                  label=last_year, animated=True)
+    line, = ax.plot([], [], color='#31a354', linewidth=3.5,
+                    linestyle=densely_dashdot_linestyle,
+                    label=current_year, animated=True)
+
+    ymax = np.nanmax(np.concatenate([last_counts, current_counts, [1]]))
+    ax.set_xlim(0, len(weeks) + 1)
+    ax.set_ylim(0, ymax * 1.1)
+    sns.despine(offset=10,)
+    ax.set_xlabel('52 weeks of calendar year')
+    ax.set_ylabel('work requests (per week)')
+    ax.get_xaxis().set_ticks([]) # remove xaxis tick labels
+    ax.set_title('Maintenance Work Request Volume\nThrough {} ({} vs {})'.
+                 format(runtime_stamp, last_year, current_year),
+                 fontname='monospace', fontsize='x-large')
+    ## proxy legend entries so the legend is part of the static background
+    legend_handles = [Patch(color='#a1d99b', label=last_year),
+                      Line2D([], [], color='#31a354', linewidth=3.5,
+                             linestyle=densely_dashdot_linestyle,
+                             label=current_year)]
+    ax.legend(handles=legend_handles, bbox_to_anchor=(0,-.095), loc='lower left',
+              ncol=2, frameon=False)
+
+    if not os.path.exists(folder):
+        os.mkdir(folder)
+
+    base_fname = ('{} weekly_volume_comparision.{}'.format(runtime_stamp, fmt))
+    full_fname = os.path.join(folder, base_fname)
+
+    ffmpeg = shutil.which(plt.rcParams['animation.ffmpeg_path'])
+    if ffmpeg is None:
+        status = 'Fail... ffmpeg not found'
+        full_fname = None
+    else:
+        canvas = fig.canvas
+        canvas.draw()
+        width, height = canvas.get_width_height()
+        background = canvas.copy_from_bbox(fig.bbox)
+
+        output_args = (['-vf', 'split[a][b];[a]palettegen[p];[b][p]paletteuse']
+                       if fmt == 'gif' else
+                       ['-vcodec', 'libx264', '-pix_fmt', 'yuv420p'])
+        encoder = subprocess.Popen(
+            [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo',
+             '-pix_fmt', 'rgba', '-s', '{}x{}'.format(width, height),
+             '-r', str(fps), '-i', '-'] + output_args + [full_fname],
+            stdin=subprocess.PIPE)
+
+        try:
+            for idx, week in enumerate(weeks):
+                ## bars are permanent: draw the new one and fold it into the
+                ## background, then draw the (changing) line on top of it
+                canvas.restore_region(background)
+                bars[idx].set_height(last_counts[idx])
+                ax.draw_artist(bars[idx])
+                background = canvas.copy_from_bbox(fig.bbox)
+
+                line.set_data(weeks[:idx + 1], current_counts[:idx + 1])
+                ax.draw_artist(line)
+                encoder.stdin.write(canvas.buffer_rgba())
+            encoder.stdin.close()
+        except OSError:
+            ## ffmpeg exited early (e.g. no libx264 for mp4), fall through
+            ## to the exit code check below
+            pass
+
+        if encoder.wait() == 0 and os.path.isfile(full_fname):
+            status = 'Pass'
+        else:
+            status = 'Fail... ffmpeg exited with code {}'.format(encoder.returncode)
+            if os.path.isfile(full_fname):
+                os.remove(full_fname)
+            full_fname = None
+
+    plt.close(fig)
+
+    ## Event logging
+    obj = inspect.currentframe()
+    frame = inspect.getframeinfo(obj)
+
+    logging.basicConfig(
+        filename=logfile,
+        format='%(asctime)s ::: **%(levelname)s** %(message)s', datefmt='%Y-%m-%d %I:%M:%S')
+
+    logger = logging.getLogger(frame.function)
+    logger.setLevel(logging.DEBUG)
+    log_message = ('MODULE:: {} FUNCTION:: {} STATUS::   {}'
+                   .format(frame.filename,frame.function,status))
+    logger.debug(log_message)
+
+    return full_fname
+
+
+## dot plot of duration percentiles by problem type read from the
+## streaming duration sketches. shows how long the typical (p50) and
+## the slowest (p90, p99) requests completed in recent weeks took
+## against a service level target
+def duration_sla_chart(sketch, topn=15, sla_days=30, weeks=13, as_of=None,
+                       folder=image_folder):
+    """Create chart of p50/p90/p99 request duration for the top problem types.
+
+    Parameters
+    ----------
+    sketch:     duration_sketch.DurationSketch
+        duration sketch grouped by 'prob_type'
+
+    topn:       int
+        number of problem types to include, by completed request volume.
+
+    sla_days:   int
+        service level target in days drawn as a reference line.
+
+    weeks:      int
+        number of weeks of completed requests, through the as_of week, the
+        percentiles are read from (default 13).
+
+    as_of:      datetime, optional
+        date used in the title and filename stamp (default is today).
+
+    folder:     str, optional
+        folder the chart image is saved to (default is data/images).
+
+    Returns
+    -------
+    String: filename of chart image.
+
+    Examples
+    --------
+    >>> duration_sla_chart(sketch=sketches[('prob_type',)])
+
+    >>> duration_sla_chart(sketch=sketches[('prob_type',)], topn=10, sla_days=14, weeks=4)
+
+    """
+    as_of = as_of or datetime.today()
+    runtime_stamp = as_of.strftime('%m-%d-%Y')
+    start = pd.Timestamp(as_of) - pd.Timedelta(weeks=weeks - 1)
+    percentiles = (sketch.quantiles(q=(.5, .9, .99), start=start, end=as_of)
+                   .sort_values('count', ascending=False)
+                   .head(topn)
+                   .iloc[::-1])
+    labels = [key[0] if isinstance(key, tuple) else key for key in percentiles.index]
+    positions = np.arange(len(labels))
+
+    fig, ax = plt.subplots(figsize=(11,7))
+    ax.hlines(positions, percentiles['p50'], percentiles['p99'],
+              color='#a1d99b', linewidth=3)
+    for col, color, marker in [('p50','#31a354','o'), ('p90','#006d2c','s'),
+                               ('p99','#00441b','D')]:
+        ax.scatter(percentiles[col], positions, color=color, marker=marker,
+                   zorder=3, label=col)
+    ax.axvline(sla_days, color='grey', linestyle='--', linewidth=1.5,
+               label='{} day target'.format(sla_days))
+
+    ax.set_xscale('symlog', linthresh=1)
+    ax.set_yticks(positions)
+    ax.set_yticklabels(labels)
+    sns.despine(offset=10,)
+    plt.xlabel('days to complete')
+    plt.title('Maintenance Request Completion Time\nPercentiles of {} Weeks Through {}'
+              .format(weeks, runtime_stamp), fontname='monospace', fontsize='x-large')
+    plt.legend(bbox_to_anchor=(0,-.22), loc='lower left', ncol=4, frameon=False)
+    plt.tight_layout()
+
+    if not os.path.exists(folder):
+        os.mkdir(folder)
+
+    base_fname = ('{} duration_percentiles_top{}.png'.format(runtime_stamp, topn))
+    full_fname = os.path.join(folder, base_fname)
+    fig.savefig(full_fname)
+    plt.close(fig)
+
     if os.path.isfile(full_fname):
         status = 'Pass'
     else:
         status = 'Fail'
-    
-    ## Event logging 
+
+    ## Event logging
     obj = inspect.currentframe()
     frame = inspect.getframeinfo(obj)
-    
+
     logging.basicConfig(
         filename=logfile,
         format='%(asctime)s ::: **%(levelname)s** %(message)s', datefmt='%Y-%m-%d %I:%M:%S')
-    
+
     logger = logging.getLogger(frame.function)
     logger.setLevel(logging.DEBUG)
     log_message = ('MODULE:: {} FUNCTION:: {} STATUS::   {}'
                    .format(frame.filename,frame.function,status))
     logger.debug(log_message)
-    
-    return full_fname
\ No newline at end of file
+
+    return full_fname
+
+
+## map style scatter of dgs buildings by lat/long with the
+## neighborhoods of the flagged request hotspots highlighted
+def hotspot_map(index, spots, radius_m=400, as_of=None, folder=image_folder):
+    """Create scatter map of buildings highlighting request hotspot neighborhoods.
+
+    Parameters
+    ----------
+    index:      spatial.BuildingIndex
+        spatial index of the buildings
+
+    spots:      pandas dataframe
+        hotspots returned from spatial.hotspots
+
+    radius_m:   float
+        neighborhood radius in meters used to find the hotspots.
+
+    as_of:      datetime, optional
+        date used in the title and filename stamp (default is today).
+
+    folder:     str, optional
+        folder the chart image is saved to (default is data/images).
+
+    Returns
+    -------
+    String: filename of chart image.
+
+    Examples
+    --------
+    >>> hotspot_map(index=building_index, spots=hotspots(dframe, building_index))
+
+    """
+    runtime_stamp = (as_of or datetime.today()).strftime('%m-%d-%Y')
+    buildings = index.buildings
+
+    fig, ax = plt.subplots(figsize=(8,8))
+    ax.scatter(buildings['longitude'], buildings['latitude'], s=12,
+               color='#c7e9c0', label='DGS buildings')
+
+    cmap = plt.cm.summer_r
+    for rank, row in enumerate(spots.head(5).itertuples()):
+        nearby = index.within(row.bl_id, radius_m=radius_m)
+        color = cmap(1 - rank / 5.)
+        ax.scatter(nearby['longitude'], nearby['latitude'], s=40, color=color,
+                   label='{} ({} requests)'.format(row.prob_type.title(), row.requests))
+        center = nearby.iloc[0]
+        ax.annotate(getattr(row, 'bld_name', row.bl_id),
+                    (center['longitude'], center['latitude']),
+                    xytext=(6, 6), textcoords='offset points', color='green',
+                    fontfamily='monospace')
+
+    sns.despine(left=True, bottom=True)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.set_aspect(1 / np.cos(np.radians(buildings['latitude'].mean())))
+    week_stamp = (spots['week'].iloc[0].start_time.strftime('%m-%d-%Y')
+                  if len(spots) > 0 else runtime_stamp)
+    plt.title('Maintenance Request Hotspots\nWeek of {}'.format(week_stamp),
+              fontname='monospace', fontsize='x-large', color='green')
+    plt.legend(loc='lower left', frameon=False)
+
+    if not os.path.exists(folder):
+        os.mkdir(folder)
+
+    base_fname = ('{} request_hotspots.png'.format(runtime_stamp))
+    full_fname = os.path.join(folder, base_fname)
+    fig.savefig(full_fname)
+    plt.close(fig)
+
+    if os.path.isfile(full_fname):
+        status = 'Pass'
+    else:
+        status = 'Fail'
+
+    ## Event logging
+    obj = inspect.currentframe()
+    frame = inspect.getframeinfo(obj)
+
+    logging.basicConfig(
+        filename=logfile,
+        format='%(asctime)s ::: **%(levelname)s** %(message)s', datefmt='%Y-%m-%d %I:%M:%S')
+
+    logger = logging.getLogger(frame.function)
+    logger.setLevel(logging.DEBUG)
+    log_message = ('MODULE:: {} FUNCTION:: {} STATUS::   {}'
+                   .format(frame.filename,frame.function,status))
+    logger.debug(log_message)
+
+    return full_fname
+
+
+## stacked area chart of the open work orders (backlog) at the
+## end of each day split by the problem types with the largest
+## backlog today and the rest grouped as 'ALL OTHER'
+def open_backlog_chart(backlog, topn=8, as_of=None, folder=image_folder):
+    """Create stacked area chart of open work orders per day by problem type.
+
+    Parameters
+    ----------
+    backlog:  pandas dataframe
+        open work orders per day and problem type from
+        backlog.BacklogEngine.series
+
+    topn:     int
+        number of problem types shown separately, by current backlog.
+
+    as_of:    datetime, optional
+        last day of the chart and filename stamp (default is today).
+
+    folder:   str, optional
+        folder the chart image is saved to (default is data/images).
+
+    Returns
+    -------
+    String: filename of chart image.
+
+    Examples
+    --------
+    >>> open_backlog_chart(backlog=engine.series())
+
+    """
+    as_of = as_of or datetime.today()
+    runtime_stamp = as_of.strftime('%m-%d-%Y')
+    backlog = backlog.loc[:as_of]
+
+    top_types = backlog.iloc[-1].sort_values(ascending=False).head(topn).index
+    stacked = backlog[top_types].copy()
+    stacked['ALL OTHER'] = backlog.drop(top_types, axis=1).sum(axis=1)
+
+    fig, ax = plt.subplots(figsize=(11,6))
+    colors = plt.cm.summer(np.linspace(0, .9, len(stacked.columns)))
+    ax.stackplot(stacked.index, stacked.T.values, colors=colors,
+                 labels=[col.title() for col in stacked.columns])
+
+    sns.despine(offset=10,)
+    plt.ylabel('open work orders')
+    plt.title('Open Maintenance Work Orders\nThrough {} ({} open)'.
+              format(runtime_stamp, int(stacked.iloc[-1].sum())),
+              fontname='monospace', fontsize='x-large')
+    plt.legend(loc='upper left', ncol=3, frameon=False, fontsize='small')
+
+    if not os.path.exists(folder):
+        os.mkdir(folder)
+
+    base_fname = ('{} open_backlog.png'.format(runtime_stamp))
+    full_fname = os.path.join(folder, base_fname)
+    fig.savefig(full_fname)
+    plt.close(fig)
+
+    if os.path.isfile(full_fname):
+        status = 'Pass'
+    else:
+        status = 'Fail'
+
+    ## Event logging
+    obj = inspect.currentframe()
+    frame = inspect.getframeinfo(obj)
+
+    logging.basicConfig(
+        filename=logfile,
+        format='%(asctime)s ::: **%(levelname)s** %(message)s', datefmt='%Y-%m-%d %I:%M:%S')
+
+    logger = logging.getLogger(frame.function)
+    logger.setLevel(logging.DEBUG)
+    log_message = ('MODULE:: {} FUNCTION:: {} STATUS::   {}'
+                   .format(frame.filename,frame.function,status))
+    logger.debug(log_message)
+
+    return full_fname
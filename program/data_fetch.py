@@ -14,6 +14,10 @@ from datetime import datetime
 
 import datadotworld as dw
 import pandas as pd
+from datadotworld.config import ChainedConfig
+
+from dw_query import query_table
+from profiling import stage
 warnings.filterwarnings('ignore')
 
 config = ConfigParser() # accessing datadotworld variables
@@ -21,10 +25,36 @@ config.read(os.path.join(os.pardir,'configuration','config.ini'))
 folder = config.get(section='data_files', option='directory')
 file = config.get(section='data_files',option='geo_file')
 
+
+def client_token():
+    """Return the data.world token, or None when none is configured.
+
+    The token is read from a 'token' option of the [datadotworld] section of
+    config.ini, else from the datadotworld client's own configuration (the
+    DW_AUTH_TOKEN environment variable or the ~/.dw/config file written by
+    'dw configure'), which is how the bot is normally authenticated.
+    """
+    token = config.get(section='datadotworld', option='token', fallback=None)
+    if token:
+        return token
+    try:
+        return ChainedConfig().auth_token
+    except RuntimeError:  # client not configured
+        return None
+
+
+dw_token = client_token()
+
 def get_data(key, data_name):
     """
     Return datadotworld dataset as pandas dataframe.
 
+    The table is queried with dw_query.query_table over the shared pooled
+    session from the transport module with the token from client_token
+    (the datadotworld client's stored token by default). Only when no token
+    is found at all is the datadotworld client download used, which
+    bypasses the pooled session and its latency metrics.
+
     Parameters
     ----------
     key:        str
@@ -41,8 +71,11 @@ def get_data(key, data_name):
     --------
     >>> load_data(key='org/division', data_name='employee_history')
     """
-    data_obj = dw.load_dataset(dataset_key=key, auto_update=True)
-    data = data_obj.dataframes[data_name]
+    if dw_token:
+        data = query_table(key=key, data_name=data_name, token=dw_token)
+    else:
+        data_obj = dw.load_dataset(dataset_key=key, auto_update=True)
+        data = data_obj.dataframes[data_name]
 
     return data
 
@@ -211,16 +244,19 @@ def dataframe(key,data_name,lat_long_file,skiprows):
                   lat_long_file=filename, skiprows=5)
     """
     try:
-        data = get_data(key=key,data_name=data_name)
+        with stage('fetch'):
+            data = get_data(key=key,data_name=data_name)
     except Exception as e:
         print(e)
     try:
-        cleaned_data = clean_data(frame=data)
+        with stage('clean_data'):
+            cleaned_data = clean_data(frame=data)
     except Exception as e:
         print(e)
     try:
-        dframe = add_latlong(frame=cleaned_data,file=lat_long_file,
-                    nrows2skip=skiprows)
+        with stage('add_latlong'):
+            dframe = add_latlong(frame=cleaned_data,file=lat_long_file,
+                        nrows2skip=skiprows)
     except Exception as e:
         print(e)
 
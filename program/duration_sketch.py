@@ -0,0 +1,223 @@
+"""Module with mergeable quantile sketches for tracking work order durations
+(p50/p90/p99) by problem type and building for each week, without sorting the
+full request history on every run of the DGS twitterbot program.
+"""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+sketch_file = os.path.join(os.pardir,'data','duration_sketch.pkl')
+
+
+class DurationSketch(object):
+    """Log-bucketed histograms of durations (days) per completion week and group.
+
+    Durations are counted in buckets whose width grows geometrically, so any
+    quantile read back is within ``accuracy`` (relative) of the exact value.
+    Histograms are kept separately for each week work orders were completed
+    in and merge by adding counts, so percentiles for the last few weeks (or
+    any range of weeks) are read by merging those weeks.
+
+    Alongside the histograms the sketch keeps the (week, group, bucket) each
+    work order was counted in, so when an order is reopened or completed
+    again, however long after, its old count is taken back before the new
+    one is added.
+
+    Parameters
+    ----------
+    by:         list
+        columns of the cleaned dataframe to group durations by.
+
+    accuracy:   float
+        relative accuracy of the returned quantiles (default 0.02).
+
+    max_days:   int
+        largest duration tracked exactly in a bucket; longer durations are
+        counted in the last bucket.
+
+    Examples
+    --------
+    >>> sketch = DurationSketch(by=['prob_type'])
+    >>> sketch.update(frame=dframe)
+    >>> sketch.quantiles(q=(.5, .9, .99), start='2019-01-01')
+    """
+
+    def __init__(self, by, accuracy=.02, max_days=20000):
+        self.by = list(by)
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.num_buckets = int(np.ceil(np.log(max_days) / np.log(self.gamma))) + 2
+        self.counts = {}
+        self.orders = (pd.DataFrame(columns=['week'] + self.by + ['bucket'],
+                                    index=pd.Index([], name='wo_id'))
+                       .astype({'week': np.int64, 'bucket': np.int16}))
+
+    def _bucket(self, durations):
+        """Map durations in days to bucket indexes (0 holds same day work)."""
+        days = np.clip(np.asarray(durations, dtype=float), 0, None)
+        idx = np.zeros(len(days), dtype=int)
+        positive = days > 0
+        idx[positive] = np.ceil(np.log(days[positive]) / np.log(self.gamma)).astype(int) + 1
+        return np.minimum(idx, self.num_buckets - 1)
+
+    def _bucket_values(self):
+        """Representative duration (days) of each bucket."""
+        upper = self.gamma ** (np.arange(self.num_buckets) - 1)
+        values = 2 * upper / (self.gamma + 1)
+        values[0] = 0
+        return values
+
+    def _contributions(self, frame):
+        """Return the completion week (ordinal), group and bucket of completed orders."""
+        done = frame[frame['duration'].notnull() & frame['completed'].notnull()]
+        orders = pd.DataFrame(
+            {'week': pd.DatetimeIndex(done['completed']).to_period('W').asi8},
+            index=pd.Index(done['wo_id'].values, name='wo_id'))
+        for col in self.by:
+            orders[col] = done[col].fillna('NONE').values
+        orders['bucket'] = self._bucket(done['duration']).astype(np.int16)
+
+        return orders[~orders.index.duplicated(keep='last')]
+
+    def _add(self, orders, sign):
+        """Add (sign=1) or take back (sign=-1) the counts of work orders."""
+        if len(orders) == 0:
+            return
+        bucket_counts = (orders.groupby(['week'] + self.by + ['bucket'])
+                         .size()
+                         .unstack(fill_value=0))
+
+        for key, row in zip(bucket_counts.index, bucket_counts.values):
+            key = (pd.Period(ordinal=key[0], freq='W'),) + tuple(key[1:])
+            hist = self.counts.setdefault(key, np.zeros(self.num_buckets, dtype=np.int64))
+            hist[bucket_counts.columns.values] += sign * row
+            if not hist.any():
+                del self.counts[key]
+
+    def update(self, frame):
+        """Count new, re-completed and reopened work orders of frame.
+
+        Parameters
+        ----------
+        frame:  pandas dataframe
+            dataframe returned from clean_data, or only its new and changed
+            rows.
+
+        Returns
+        -------
+        int: number of work orders counted or recounted.
+        """
+        new = self._contributions(frame)
+        cols = ['week'] + self.by + ['bucket']
+        old = self.orders.loc[self.orders.index.intersection(pd.Index(frame['wo_id']))]
+        same = (new.reindex(old.index)[cols] == old[cols]).all(axis=1)
+        unchanged = old.index[same.values]
+
+        old = old.drop(unchanged)
+        new = new.drop(new.index.intersection(unchanged))
+        self._add(old, -1)
+        self._add(new, 1)
+        self.orders = pd.concat([self.orders.drop(old.index), new])
+
+        return len(new)
+
+    def merge(self, other):
+        """Add the counts of another sketch, over other work orders, into this one."""
+        if other.num_buckets != self.num_buckets or other.gamma != self.gamma:
+            raise ValueError('sketches must share accuracy and max_days to merge')
+        for key, hist in other.counts.items():
+            self.counts.setdefault(key, np.zeros(self.num_buckets, dtype=np.int64))
+            self.counts[key] += hist
+        self.orders = pd.concat([self.orders, other.orders])
+        return self
+
+    def quantiles(self, q=(.5, .9, .99), start=None, end=None):
+        """Return duration quantiles in days for every group.
+
+        Parameters
+        ----------
+        q:      tuple
+            quantiles to compute, each between 0 and 1.
+
+        start:  str or datetime, optional
+            only merge work orders completed in or after the week of start.
+
+        end:    str or datetime, optional
+            only merge work orders completed in or before the week of end.
+
+        Returns
+        -------
+        pandas dataframe indexed by the grouping columns with a 'count'
+        column and one column per quantile named p50, p90...
+        """
+        start = pd.Timestamp(start).to_period('W') if start is not None else None
+        end = pd.Timestamp(end).to_period('W') if end is not None else None
+
+        merged = {}
+        for (week, *group), hist in self.counts.items():
+            if (start is None or week >= start) and (end is None or week <= end):
+                group = tuple(group)
+                merged[group] = merged.get(group, 0) + hist
+
+        if not merged:
+            return pd.DataFrame(columns=['count'] + ['p{:g}'.format(100 * i) for i in q])
+
+        keys = list(merged.keys())
+        matrix = np.vstack([merged[key] for key in keys])
+        cumulative = matrix.cumsum(axis=1)
+        totals = cumulative[:, -1]
+        values = self._bucket_values()
+
+        result = {'count': totals}
+        for quantile in q:
+            ranks = np.ceil(quantile * totals)[:, None]
+            result['p{:g}'.format(100 * quantile)] = values[(cumulative < ranks).sum(axis=1)]
+
+        return pd.DataFrame(result, index=pd.MultiIndex.from_tuples(keys, names=self.by))
+
+
+def load_sketches(file=sketch_file, groupings=(('prob_type',), ('bl_id',))):
+    """Load persisted duration sketches or start new ones for each grouping.
+
+    Returns
+    -------
+    dict of DurationSketch keyed by the tuple of grouping columns.
+    """
+    if os.path.isfile(file):
+        with open(file, 'rb') as f:
+            return pickle.load(f)
+
+    return {grouping: DurationSketch(by=grouping) for grouping in groupings}
+
+
+def update_sketches(frame, file=sketch_file):
+    """Update the persisted duration sketches with new, re-completed and reopened work orders.
+
+    Parameters
+    ----------
+    frame:  pandas dataframe
+        dataframe returned from clean_data.
+
+    file:   str
+        pickle file the sketches are persisted to between runs.
+
+    Returns
+    -------
+    dict of DurationSketch keyed by the tuple of grouping columns.
+
+    Examples
+    --------
+    >>> sketches = update_sketches(frame=dframe)
+    >>> sketches[('prob_type',)].quantiles(start='2019-01-01')
+    """
+    sketches = load_sketches(file=file)
+    for sketch in sketches.values():
+        sketch.update(frame)
+
+    with open(file, 'wb') as f:
+        pickle.dump(sketches, f)
+
+    return sketches
@@ -0,0 +1,50 @@
+"""Module for querying data.world tables with the SQL API over the shared
+pooled session of the transport module, used by data_fetch in place of the
+datadotworld client download when a token is available.
+"""
+
+import io
+
+import pandas as pd
+
+from transport import session
+
+sql_url = 'https://api.data.world/v0/sql/{}'
+
+# the datadotworld client download types work order ids as numbers, keep
+# them floats so clean_data converts them to the same strings as before
+dtypes = {'wo_id': float}
+
+
+def query_table(key, data_name, token, url=sql_url):
+    """Return all rows of a data.world table as pandas dataframe.
+
+    Parameters
+    ----------
+    key:        str
+        Dataset key for target data.world dataset.
+
+    data_name:  str
+        Name of the table in the dataset, quoted in the query.
+
+    token:      str
+        data.world API token.
+
+    url:        str
+        SQL API endpoint with a placeholder for the dataset key.
+
+    Returns
+    -------
+    pandas dataframe
+
+    Examples
+    --------
+    >>> query_table(key='org/division', data_name='work_orders', token=dw_token)
+    """
+    query = 'SELECT * FROM `{}`'.format(data_name.replace('`', '``'))
+    response = session.get(url.format(key), params={'query': query},
+                           headers={'Authorization': 'Bearer {}'.format(token),
+                                    'Accept': 'text/csv'})
+    response.raise_for_status()
+
+    return pd.read_csv(io.StringIO(response.text), dtype=dtypes)
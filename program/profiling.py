@@ -0,0 +1,184 @@
+"""Module for opt-in per stage CPU and memory profiling of the DGS twitterbot
+program. When enabled, each stage (fetch, clean_data, add_latlong, every chart
+and every upload) writes a cProfile stats file that flame graph tools such as
+snakeviz, flameprof or gprof2dot can read, along with a json summary of its
+runtime, tracemalloc peak (above the memory already held when the stage
+starts) and top allocation sites.
+
+Enable with TWITTERBOT_PROFILE=1 or 'enabled = true' in a [profiling] section
+of config.ini, then compare two runs with:
+
+    python profiling.py diff logs/profiles/<run_a> logs/profiles/<run_b>
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+from configparser import ConfigParser
+from contextlib import contextmanager
+from datetime import datetime
+
+config = ConfigParser()
+config.read(os.path.join(os.pardir,'configuration','config.ini'))
+
+enabled = (os.environ.get('TWITTERBOT_PROFILE') == '1' or
+           config.getboolean('profiling', 'enabled', fallback=False))
+profile_folder = os.path.join('logs', 'profiles')
+run_folder = os.path.join(profile_folder, datetime.now().strftime('%Y-%m-%d_%H%M%S'))
+top_allocations = 15
+
+_stage_count = 0
+_active = False
+
+
+@contextmanager
+def stage(name):
+    """Profile the enclosed block as a named pipeline stage when enabled.
+
+    Stages do not nest: a stage started while another is active runs
+    unprofiled and is counted in the outer stage.
+
+    Parameters
+    ----------
+    name:   str
+        name of the stage used in the artifact filenames.
+
+    Examples
+    --------
+    >>> with stage('clean_data'):
+    ...     cleaned = clean_data(frame=raw)
+    """
+    global _stage_count, _active
+    if not enabled or _active:
+        yield
+        return
+
+    if not os.path.exists(run_folder):
+        os.makedirs(run_folder)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(25)
+
+    _active = True
+    _stage_count += 1
+    base_fname = os.path.join(run_folder, '{:02d}_{}'.format(_stage_count, name))
+
+    snapshot_before = tracemalloc.take_snapshot()
+    start_current, start_peak = tracemalloc.get_traced_memory()
+    if hasattr(tracemalloc, 'reset_peak'):  # python 3.9+
+        tracemalloc.reset_peak()
+        start_peak = 0
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        seconds = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        # without reset_peak the peak only belongs to this stage when the
+        # stage raised it, otherwise fall back to the memory it kept
+        if peak <= start_peak:
+            peak = current
+        snapshot_after = tracemalloc.take_snapshot()
+        _active = False
+
+        profiler.dump_stats(base_fname + '.prof')
+        # leave out the memory used by tracemalloc's own snapshots
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        allocations = (snapshot_after.filter_traces(ignore)
+                       .compare_to(snapshot_before.filter_traces(ignore), 'lineno'))
+        summary = {
+            'stage': name,
+            'seconds': round(seconds, 4),
+            'peak_kb': round(max(peak - start_current, 0) / 1024, 1),
+            'top_allocations': [
+                {'site': str(stat.traceback[0]),
+                 'size_diff_kb': round(stat.size_diff / 1024, 1),
+                 'count_diff': stat.count_diff}
+                for stat in allocations[:top_allocations]]}
+        with open(base_fname + '.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+def load_run(folder):
+    """Return stage summaries and function stats of a profiled run keyed by stage name."""
+    run = {}
+    for fname in sorted(os.listdir(folder)):
+        if fname.endswith('.json'):
+            base = os.path.join(folder, fname[:-len('.json')])
+            with open(base + '.json') as f:
+                summary = json.load(f)
+            summary['functions'] = {
+                '{}:{}({})'.format(*func): stats[3]
+                for func, stats in pstats.Stats(base + '.prof').stats.items()}
+            # stages repeated within a run (e.g. uploads of a second tweet)
+            name, repeat = summary['stage'], 1
+            while name in run:
+                repeat += 1
+                name = '{}#{}'.format(summary['stage'], repeat)
+            run[name] = summary
+
+    return run
+
+
+def diff_runs(folder_a, folder_b, topn=10):
+    """Compare two profiled runs stage by stage.
+
+    Parameters
+    ----------
+    folder_a:   str
+        run folder of the baseline run.
+
+    folder_b:   str
+        run folder of the run to compare against the baseline.
+
+    topn:       int
+        number of functions with the largest change in cumulative time
+        reported for each stage.
+
+    Returns
+    -------
+    str: report of runtime, peak memory and function cumulative time changes.
+
+    Examples
+    --------
+    >>> diff_runs('logs/profiles/2019-03-04_090000', 'logs/profiles/2019-03-11_090000')
+    """
+    run_a, run_b = load_run(folder_a), load_run(folder_b)
+    lines = []
+    for name in list(run_a) + [s for s in run_b if s not in run_a]:
+        a, b = run_a.get(name), run_b.get(name)
+        if a is None or b is None:
+            lines.append('{}: only in {}'.format(name, folder_b if a is None else folder_a))
+            continue
+
+        lines.append('{}: {:.3f}s -> {:.3f}s ({:+.3f}s)  peak {:.0f}KB -> {:.0f}KB ({:+.0f}KB)'
+                     .format(name, a['seconds'], b['seconds'], b['seconds'] - a['seconds'],
+                             a['peak_kb'], b['peak_kb'], b['peak_kb'] - a['peak_kb']))
+
+        functions = set(a['functions']) | set(b['functions'])
+        changes = sorted(((b['functions'].get(func, 0) - a['functions'].get(func, 0), func)
+                          for func in functions), reverse=True)
+        for change, func in changes[:topn]:
+            if change > 0:
+                lines.append('    {:+.3f}s  {}'.format(change, func))
+
+        sites_a = {alloc['site']: alloc['size_diff_kb'] for alloc in a['top_allocations']}
+        for alloc in b['top_allocations'][:3]:
+            lines.append('    {:+.0f}KB (was {})  {}'.format(
+                alloc['size_diff_kb'], sites_a.get(alloc['site'], 'not in top'), alloc['site']))
+
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'diff':
+        print(diff_runs(sys.argv[2], sys.argv[3]))
+    else:
+        print('usage: python profiling.py diff <run_folder_a> <run_folder_b>')
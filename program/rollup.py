@@ -0,0 +1,204 @@
+"""Module with the persisted weekly rollup store of the DGS twitterbot program.
+Request counts and duration sums are kept by (year, week, period, prob_type,
+bl_id, work_team_id) and maintained from deltas of new and changed work
+orders, so a run no longer has to re-aggregate the full request history.
+"""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+rollup_file = os.path.join(os.pardir,'data','weekly_rollup.pkl')
+
+keys = ['year', 'week', 'period', 'prob_type', 'bl_id', 'work_team_id']
+measures = ['requests', 'completed', 'duration_sum']
+
+
+def contributions(frame):
+    """Return the rollup key and measures each work order contributes.
+
+    Parameters
+    ----------
+    frame:  pandas dataframe
+        rows of the dataframe returned from clean_data.
+
+    Returns
+    -------
+    pandas dataframe indexed by wo_id with the key and measure columns.
+    """
+    duration = frame['duration'].values.astype(float)
+    done = ~np.isnan(duration)
+    orders = pd.DataFrame({
+        'year': frame.index.year,
+        'week': frame.index.isocalendar().week.values.astype(int),
+        'period': frame.index.to_period('W'),
+        'prob_type': frame['prob_type'].fillna('NONE').values,
+        'bl_id': frame['bl_id'].fillna('NONE').values,
+        'work_team_id': frame['work_team_id'].fillna('NONE').values,
+        'requests': 1,
+        'completed': done.astype(int),
+        'duration_sum': np.where(done, duration, 0)},
+        index=pd.Index(frame['wo_id'].values, name='wo_id'))
+
+    # a work order listed twice in one delta counts once, as its last version
+    return orders[~orders.index.duplicated(keep='last')]
+
+
+class RollupStore(object):
+    """Weekly rollup of request counts and duration sums kept up to date by deltas.
+
+    Alongside the rollup the store keeps what every work order last
+    contributed, so when an order changes (closed, reopened, reclassified)
+    its old contribution is subtracted from its old bucket before the new
+    one is added.
+
+    Examples
+    --------
+    >>> store = RollupStore.load()
+    >>> store.apply(changed_rows)
+    >>> store.table(by=['year', 'prob_type'])
+    >>> store.save()
+    """
+
+    def __init__(self):
+        self.rollup = pd.DataFrame(columns=measures,
+                                   index=pd.MultiIndex.from_arrays([[]] * len(keys), names=keys))
+        self.orders = (pd.DataFrame(columns=keys + measures,
+                                    index=pd.Index([], name='wo_id'))
+                       .astype({'requests': int, 'completed': int, 'duration_sum': float}))
+
+    @classmethod
+    def load(cls, file=rollup_file):
+        """Load the persisted store or start an empty one."""
+        if os.path.isfile(file):
+            with open(file, 'rb') as f:
+                return pickle.load(f)
+        return cls()
+
+    def save(self, file=rollup_file):
+        with open(file, 'wb') as f:
+            pickle.dump(self, f)
+
+    def _apply_delta(self, delta):
+        """Add signed measure rows (with key columns) into the rollup."""
+        if len(delta) == 0:
+            return
+        summed = delta.groupby(keys)[measures].sum()
+        if len(self.rollup) > 0:
+            # only the touched buckets change, the rest are aligned as is
+            summed = (self.rollup.add(summed, fill_value=0)
+                      .astype({'requests': int, 'completed': int}))
+        self.rollup = summed[summed['requests'] != 0]
+
+    def changed(self, frame):
+        """Return the rows of frame that are new or differ from the store.
+
+        This is the fallback for a full fetch: every row of frame is compared
+        with what the store holds, so its cost grows with the history. When
+        only new and changed rows are fetched, pass them to apply directly.
+        """
+        if len(self.orders) == 0:
+            return frame
+        new = contributions(frame)
+        old = self.orders.reindex(new.index)
+        same = ((new[keys + measures] == old[keys + measures]).all(axis=1))
+        return frame[frame['wo_id'].isin(new.index[~same.values])]
+
+    def apply(self, frame):
+        """Apply new and changed work orders to the rollup.
+
+        Parameters
+        ----------
+        frame:  pandas dataframe
+            new or changed rows of the dataframe returned from clean_data.
+
+        Returns
+        -------
+        int: number of work orders applied.
+        """
+        new = contributions(frame)
+        old = self.orders.loc[self.orders.index.intersection(new.index)]
+
+        reversed_old = old.copy()
+        reversed_old[measures] = -reversed_old[measures]
+        self._apply_delta(pd.concat([reversed_old, new]))
+
+        self.orders = pd.concat([self.orders.drop(old.index), new])
+        return len(new)
+
+    def remove(self, wo_ids):
+        """Take deleted work orders out of the rollup."""
+        old = self.orders.loc[self.orders.index.intersection(pd.Index(wo_ids))]
+        reversed_old = old.copy()
+        reversed_old[measures] = -reversed_old[measures]
+        self._apply_delta(reversed_old)
+        self.orders = self.orders.drop(old.index)
+
+    def table(self, by, years=None):
+        """Return measures summed to the given key columns.
+
+        Parameters
+        ----------
+        by:     list
+            key columns to keep, e.g. ['year', 'week'] or ['year', 'bl_id'].
+
+        years:  list, optional
+            only include these years.
+
+        Returns
+        -------
+        pandas dataframe with the key columns, requests, completed,
+        duration_sum and avg_duration columns.
+
+        Examples
+        --------
+        >>> store.table(by=['year', 'week', 'period', 'prob_type'])
+
+        >>> strong_correlations(store.table(by=['year', 'week']), 'requests')
+        """
+        rollup = self.rollup.reset_index()
+        if years is not None:
+            rollup = rollup[rollup['year'].isin(years)]
+
+        summed = rollup.groupby(by)[measures].sum().reset_index()
+        summed['avg_duration'] = summed['duration_sum'] / summed['completed'].replace(0, np.nan)
+
+        return summed
+
+
+def update_rollup(frame, file=rollup_file, full=True):
+    """Apply the new and changed rows of frame to the persisted rollup store.
+
+    Parameters
+    ----------
+    frame:  pandas dataframe
+        dataframe returned from clean_data.
+
+    file:   str
+        pickle file the store is persisted to between runs.
+
+    full:   bool
+        frame is the full dataset (default True, as data_fetch downloads the
+        whole table). Changed rows are found with RollupStore.changed and
+        work orders missing from frame are taken out as deleted, both of
+        which scan the whole history. With full=False frame holds only new
+        and changed rows and is applied directly, so the run cost depends on
+        those rows alone.
+
+    Examples
+    --------
+    >>> store = update_rollup(frame=dframe)
+
+    >>> store = update_rollup(frame=recent_rows, full=False)
+    """
+    store = RollupStore.load(file=file)
+    if full:
+        store.apply(store.changed(frame))
+        store.remove(store.orders.index.difference(frame['wo_id']))
+    else:
+        store.apply(frame)
+    store.save(file=file)
+
+    return store
@@ -0,0 +1,260 @@
+"""Module with a small read-only HTTP service for the stats and charts of the
+DGS twitterbot program. It serves the latest aggregates as json and the
+charts as png from the stores persisted by app.py (weekly rollup, duration
+sketches, open backlog) without fetching data, rendering on each poll or
+posting tweets. Responses carry an ETag tied to the data version so
+dashboards can revalidate with If-None-Match and get a 304.
+
+    python service.py --port 8080
+
+    GET /stats/weekly?by=year,week&years=2019
+    GET /stats/durations?by=prob_type&start=2019-01-01
+    GET /stats/backlog?start=2019-01-01
+    GET /charts/yearoveryear.png   /charts/donut_year.png
+    GET /charts/donut_week.png     /charts/durations.png
+    GET /charts/backlog.png
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from backlog import BacklogEngine, backlog_file
+from chart_generate import (duration_sla_chart, open_backlog_chart,
+                            topn_requests_donut, yearoveryear_reqeusts_volume)
+from duration_sketch import load_sketches, sketch_file
+from rollup import RollupStore, rollup_file
+
+chart_folder = os.path.join(os.pardir,'data','service')
+max_age = 60  # seconds clients may reuse a response before revalidating
+max_entries = 64  # rendered responses kept per data version
+render_lock = threading.Lock()  # pyplot is not thread safe, charts render one at a time
+
+
+class DataStore(object):
+    """Warm in-process copy of the persisted stores, reloaded when they change.
+
+    The data version is built from today's date and the modification times
+    of the store files, so it changes when app.py has written new data and
+    at midnight, when the charts' "Through <date>" titles move on.
+    """
+
+    def __init__(self, rollup=rollup_file, sketches=sketch_file, backlog=backlog_file,
+                 max_entries=max_entries):
+        self.files = [rollup, sketches, backlog]
+        self.lock = threading.Lock()
+        self.version = None
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.rendering = {}  # key: lock held while that key renders
+
+    def _refresh(self):
+        """Reload the stores if the version changed (lock must be held)."""
+        version = '-'.join([date.today().isoformat()] +
+                           ['{:.0f}'.format(os.path.getmtime(f) * 1000)
+                            if os.path.isfile(f) else '0' for f in self.files])
+        if version != self.version:
+            rollup, sketches, backlog = self.files
+            self.rollup = RollupStore.load(file=rollup)
+            self.sketches = load_sketches(file=sketches)
+            self.backlog = BacklogEngine.load(file=backlog)
+            self.cache = OrderedDict()
+            self.version = version
+
+        return version
+
+    def refresh(self):
+        """Reload the stores if any file changed and return the data version."""
+        with self.lock:
+            return self._refresh()
+
+    def cached(self, key, render):
+        """Return the data version and body for key, rendering it once per version.
+
+        Bodies are kept for the last ``max_entries`` keys used. Rendering
+        happens outside the store lock, so a slow chart does not hold up
+        other requests; only requests for the same key wait on each other.
+        A body whose stores were reloaded while it rendered is rendered
+        again, so the body always belongs to the returned version.
+        """
+        while True:
+            with self.lock:
+                version = self._refresh()
+                if key in self.cache:
+                    self.cache.move_to_end(key)
+                    return version, self.cache[key]
+                guard = self.rendering.setdefault(key, threading.Lock())
+
+            with guard:
+                with self.lock:
+                    if version == self.version and key in self.cache:
+                        continue
+                try:
+                    body = render()
+                finally:
+                    with self.lock:
+                        self.rendering.pop(key, None)
+                with self.lock:
+                    if version == self.version:
+                        self.cache[key] = body
+                        while len(self.cache) > self.max_entries:
+                            self.cache.popitem(last=False)
+                        return version, body
+
+
+store = DataStore()
+
+
+def _records(frame):
+    """Return json bytes of a dataframe as a list of records."""
+    frame = frame.reset_index() if frame.index.name or frame.index.nlevels > 1 else frame
+    for col in frame.columns:
+        if frame[col].dtype == object or str(frame[col].dtype).startswith(('period', 'datetime')):
+            frame[col] = frame[col].astype(str)
+
+    return frame.to_json(orient='records').encode()
+
+
+def _chart_bytes(chart, *args, **kwargs):
+    """Render a chart into the chart folder and return the png bytes."""
+    with render_lock:
+        try:
+            fname = chart(*args, folder=chart_folder, **kwargs)
+        finally:
+            plt.close('all')  # figures left open by a failed render
+
+        with open(fname, 'rb') as f:
+            body = f.read()
+        os.remove(fname)
+    return body
+
+
+def stats_weekly(params):
+    years = [int(y) for y in params['years'].split(',')] if params['years'] else None
+    return _records(store.rollup.table(by=params['by'].split(','), years=years))
+
+
+def stats_durations(params):
+    sketch = store.sketches[tuple(params['by'].split(','))]
+    return _records(sketch.quantiles(start=params['start'], end=params['end']))
+
+
+def stats_backlog(params):
+    series = store.backlog.series(start=params['start'], end=params['end'])
+    series.index.name = 'day'
+    return _records(series)
+
+
+def chart_yearoveryear(params):
+    return _chart_bytes(yearoveryear_reqeusts_volume, store.rollup)
+
+
+def chart_donut(period):
+    def render(params):
+        return _chart_bytes(topn_requests_donut, store.rollup, period=period,
+                            topn=int(params['topn']))
+    return render
+
+
+def chart_durations(params):
+    return _chart_bytes(duration_sla_chart, store.sketches[('prob_type',)],
+                        topn=int(params['topn']), sla_days=int(params['sla_days']),
+                        weeks=int(params['weeks']))
+
+
+def chart_backlog(params):
+    return _chart_bytes(open_backlog_chart, store.backlog.series(), topn=int(params['topn']))
+
+
+## path: (content type, render function, query parameters read with defaults)
+routes = {
+    '/stats/weekly': ('application/json', stats_weekly, {'by': 'year,week', 'years': None}),
+    '/stats/durations': ('application/json', stats_durations,
+                         {'by': 'prob_type', 'start': None, 'end': None}),
+    '/stats/backlog': ('application/json', stats_backlog, {'start': None, 'end': None}),
+    '/charts/yearoveryear.png': ('image/png', chart_yearoveryear, {}),
+    '/charts/donut_year.png': ('image/png', chart_donut('year'), {'topn': '20'}),
+    '/charts/donut_week.png': ('image/png', chart_donut('week'), {'topn': '20'}),
+    '/charts/durations.png': ('image/png', chart_durations,
+                              {'topn': '15', 'sla_days': '30', 'weeks': '13'}),
+    '/charts/backlog.png': ('image/png', chart_backlog, {'topn': '8'}),
+}
+
+
+class StatsHandler(BaseHTTPRequestHandler):
+    """Serve GET requests for the routes with ETag revalidation."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path not in routes:
+            body = json.dumps({'routes': sorted(routes)}).encode()
+            return self._send(404 if url.path != '/' else 200, 'application/json', body)
+
+        content_type, render, defaults = routes[url.path]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        # only the parameters the route reads make up the cache key
+        params = {key: query.get(key, default) for key, default in defaults.items()}
+        key = url.path + '?' + '&'.join('{}={}'.format(k, params[k]) for k in sorted(params)
+                                        if params[k] is not None)
+
+        def etag(version):
+            return '"{}"'.format(hashlib.sha1('{}|{}'.format(version, key).encode()).hexdigest())
+
+        version = store.refresh()
+        if etag(version) in [tag.strip() for tag in
+                             self.headers.get('If-None-Match', '').split(',')]:
+            return self._send(304, content_type, b'', etag(version))
+
+        try:
+            version, body = store.cached(key, lambda: render(params))
+        except (KeyError, ValueError) as e:
+            return self._send(400, 'application/json',
+                              json.dumps({'error': str(e)}).encode())
+        except Exception as e:
+            return self._send(500, 'application/json',
+                              json.dumps({'error': '{}: {}'.format(type(e).__name__, e)}).encode())
+
+        self._send(200, content_type, body, etag(version))
+
+    def _send(self, status, content_type, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'public, max-age={}'.format(max_age))
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StatsServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve twitterbot stats and charts.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    if not os.path.exists(chart_folder):
+        os.makedirs(chart_folder)
+    store.refresh()
+    print('serving on http://{}:{}/'.format(args.host, args.port))
+    StatsServer((args.host, args.port), StatsHandler).serve_forever()
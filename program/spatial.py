@@ -0,0 +1,215 @@
+"""Module with the spatial index over DGS buildings and the proximity hotspot
+detector of the twitterbot program. Buildings are indexed once in a KD-tree,
+and weekly request counts are summed over each building's neighborhood to
+flag clusters of nearby buildings with a spike in a problem type, e.g. a
+water main issue affecting one block.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+from anomaly import SpikeDetector
+
+earth_radius_m = 6371008.8
+
+
+def _unit_vectors(latitude, longitude):
+    """Convert lat/long degrees to 3d points on the unit sphere."""
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    return np.column_stack([np.cos(lat) * np.cos(lon),
+                            np.cos(lat) * np.sin(lon),
+                            np.sin(lat)])
+
+
+def _chord(meters):
+    """Straight line distance on the unit sphere for a great circle distance."""
+    return 2 * np.sin(np.asarray(meters) / (2 * earth_radius_m))
+
+
+class BuildingIndex(object):
+    """KD-tree over building locations for radius and nearest neighbor queries.
+
+    Points are stored on the unit sphere, so chord distances in the tree map
+    exactly to great circle distances in meters.
+
+    Parameters
+    ----------
+    buildings:  pandas dataframe
+        one row per building with bl_id, latitude and longitude columns
+        (bld_name is kept when present).
+
+    Examples
+    --------
+    >>> index = BuildingIndex.from_frame(dframe)
+    >>> index.within('B001', radius_m=400)
+    >>> index.nearest(39.2904, -76.6122, k=5)
+    """
+
+    def __init__(self, buildings):
+        buildings = (buildings.dropna(subset=['latitude', 'longitude'])
+                     .drop_duplicates('bl_id')
+                     .reset_index(drop=True))
+        self.buildings = buildings
+        self.bl_ids = pd.Index(buildings['bl_id'])
+        self.tree = cKDTree(_unit_vectors(buildings['latitude'].values,
+                                          buildings['longitude'].values))
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build the index from the buildings in the dataframe from add_latlong."""
+        columns = [col for col in ['bl_id', 'bld_name', 'latitude', 'longitude']
+                   if col in frame.columns]
+        return cls(frame[columns])
+
+    def _point(self, bl_id=None, latitude=None, longitude=None):
+        if bl_id is not None:
+            return self.tree.data[self.bl_ids.get_loc(bl_id)]
+        return _unit_vectors([latitude], [longitude])[0]
+
+    def within(self, bl_id=None, radius_m=400, latitude=None, longitude=None):
+        """Return buildings within radius_m meters of a building or a point.
+
+        Returns
+        -------
+        pandas dataframe of the buildings with a distance_m column.
+        """
+        point = self._point(bl_id, latitude, longitude)
+        idx = self.tree.query_ball_point(point, _chord(radius_m))
+        return self._result(idx, np.linalg.norm(self.tree.data[idx] - point, axis=1))
+
+    def nearest(self, latitude, longitude, k=5):
+        """Return the k buildings nearest to a point.
+
+        Returns
+        -------
+        pandas dataframe of the buildings with a distance_m column.
+        """
+        chord, idx = self.tree.query(self._point(latitude=latitude, longitude=longitude),
+                                     k=min(k, len(self.bl_ids)))
+        return self._result(np.atleast_1d(idx), np.atleast_1d(chord))
+
+    def _result(self, idx, chord):
+        result = self.buildings.iloc[list(idx)].copy()
+        result['distance_m'] = 2 * earth_radius_m * np.arcsin(np.clip(chord / 2, 0, 1))
+        return result.sort_values('distance_m')
+
+    def neighborhoods(self, radius_m=400):
+        """Return sparse building x building matrix, 1 where within radius_m.
+
+        Each building is in its own neighborhood (the diagonal is set).
+        """
+        pairs = self.tree.query_pairs(_chord(radius_m), output_type='ndarray')
+        n = len(self.bl_ids)
+        rows = np.concatenate([pairs[:, 0], pairs[:, 1], np.arange(n)])
+        cols = np.concatenate([pairs[:, 1], pairs[:, 0], np.arange(n)])
+        return sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+
+
+def hotspots(frame, index, radius_m=400, window=8, threshold=3, min_count=5,
+             weeks_back=1, through=None):
+    """Score every building neighborhood per week and problem type for spikes.
+
+    Weekly request counts are built as a (week x problem type) by building
+    matrix, summed over neighborhoods with one sparse matrix product and
+    scored with the rolling z-scores of anomaly.SpikeDetector. Flagged
+    neighborhoods overlapping a higher scoring one for the same week and
+    problem type are dropped.
+
+    Parameters
+    ----------
+    frame:      pandas dataframe
+        dataframe returned from add_latlong.
+
+    index:      BuildingIndex
+        spatial index of the buildings.
+
+    radius_m:   float
+        neighborhood radius in meters (default 400, about a city block or two).
+
+    window, threshold, min_count, weeks_back:
+        passed on to SpikeDetector and SpikeDetector.spikes.
+
+    through:    datetime, optional
+        only complete weeks before the week of this date are scored
+        (default is today).
+
+    Returns
+    -------
+    pandas dataframe with week, prob_type, bl_id, bld_name, buildings,
+    requests, baseline and zscore columns sorted by zscore.
+
+    Examples
+    --------
+    >>> hotspots(frame=dframe, index=BuildingIndex.from_frame(dframe))
+    """
+    # only the scored weeks and their baseline windows are counted
+    last = pd.Timestamp(through or datetime.today()).to_period('W') - 1
+    first = last - (window + weeks_back - 1)
+    periods = frame.index.to_period('W')
+    # requests without a problem type can't make a hotspot worth tweeting
+    keep = ((periods >= first) & (periods <= last) &
+            frame['bl_id'].isin(index.bl_ids).values & frame['prob_type'].notnull().values)
+    known, periods = frame[keep], periods[keep]
+    weeks = pd.period_range(first, last, freq='W')
+    type_codes, prob_types = pd.factorize(known['prob_type'].values, sort=True)
+    building_codes = index.bl_ids.get_indexer(known['bl_id'])
+    num_weeks, num_types, num_blds = len(weeks), len(prob_types), len(index.bl_ids)
+
+    flat = ((periods.asi8 - first.ordinal) * num_types + type_codes) * num_blds + building_codes
+    counts = np.bincount(flat, minlength=num_weeks * num_types * num_blds)
+    counts = counts.reshape(num_weeks * num_types, num_blds)
+
+    neighborhood = index.neighborhoods(radius_m)
+    neighborhood_counts = sparse.csr_matrix(counts) @ neighborhood
+    neighborhood_counts = neighborhood_counts.toarray().reshape(num_weeks, num_types * num_blds)
+
+    columns = pd.MultiIndex.from_product([prob_types, index.bl_ids],
+                                         names=['prob_type', 'bl_id'])
+    detector = SpikeDetector(neighborhood_counts, weeks, columns, window=window)
+    flagged = detector.spikes(threshold=threshold, min_count=min_count,
+                              weeks_back=weeks_back)
+    if len(flagged) == 0:
+        return flagged
+
+    flagged['bl_id'] = [key[1] for key in flagged['prob_type']]
+    flagged['prob_type'] = [key[0] for key in flagged['prob_type']]
+    sizes = np.asarray(neighborhood.sum(axis=1)).ravel().astype(int)
+    flagged['buildings'] = sizes[index.bl_ids.get_indexer(flagged['bl_id'])]
+
+    # keep the strongest center of overlapping neighborhoods
+    keep = []
+    for _, group in flagged.groupby(['week', 'prob_type'], sort=False):
+        taken = set()
+        for row in group.itertuples():
+            if row.bl_id not in taken:
+                keep.append(row.Index)
+                taken.update(index.within(row.bl_id, radius_m=radius_m)['bl_id'])
+
+    flagged = flagged.loc[keep]
+    if 'bld_name' in index.buildings.columns:
+        flagged['bld_name'] = index.buildings.set_index('bl_id')['bld_name'].reindex(flagged['bl_id']).values
+
+    return flagged.sort_values('zscore', ascending=False).reset_index(drop=True)
+
+
+def hotspot_message(spots, max_items=3):
+    """Return tweet text announcing request hotspots, or None if there are none.
+
+    Examples
+    --------
+    >>> hotspot_message(spots=hotspots(dframe, index))
+    """
+    if len(spots) == 0:
+        return None
+
+    lines = ['{} near {}: {} requests across {} buildings'.format(
+                 row.prob_type.title(), getattr(row, 'bld_name', row.bl_id),
+                 row.requests, row.buildings)
+             for row in spots.head(max_items).itertuples()]
+
+    return 'Maintenance request hotspots the week of {}\n{}'.format(
+        spots['week'].iloc[0].start_time.strftime('%m-%d-%Y'), '\n'.join(lines))
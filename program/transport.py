@@ -0,0 +1,230 @@
+"""Module with the shared HTTP transport used by the data.world and Twitter
+clients of the DGS twitterbot program. Every request made through the shared
+session reuses pooled keep-alive connections, gets a default timeout and has
+its latency recorded so slow calls can be traced per host.
+"""
+
+import json
+import os
+import threading
+import time
+
+from configparser import ConfigParser
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+config = ConfigParser()
+config.read(os.path.join(os.pardir,'configuration','config.ini'))
+
+# transport settings are optional in config.ini -- fall back to sane defaults
+pool_size = config.getint('transport', 'pool_size', fallback=10)
+max_retries = config.getint('transport', 'max_retries', fallback=3)
+connect_timeout = config.getfloat('transport', 'connect_timeout', fallback=5.0)
+read_timeout = config.getfloat('transport', 'read_timeout', fallback=60.0)
+
+# per-host request latencies (seconds) recorded by every pooled session
+metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def record_latency(name, seconds):
+    """Store the latency of a single request under a host or label name."""
+    with _metrics_lock:
+        metrics.setdefault(name, []).append(seconds)
+
+
+def latency_summary():
+    """Summarize recorded request latencies per host.
+
+    Returns
+    -------
+    dict
+        dict keyed by host name with the number of requests and the mean,
+        median and max latency in milliseconds:
+        {
+        "upload.twitter.com": {"requests": 3, "mean_ms": 210.4,
+                               "p50_ms": 198.2, "max_ms": 250.9}
+        }
+
+    Examples
+    --------
+    >>> latency_summary()
+    """
+    summary = {}
+    with _metrics_lock:
+        for name, values in metrics.items():
+            ordered = sorted(values)
+            summary[name] = {
+                'requests': len(ordered),
+                'mean_ms': round(1000 * sum(ordered) / len(ordered), 1),
+                'p50_ms': round(1000 * ordered[len(ordered) // 2], 1),
+                'max_ms': round(1000 * ordered[-1], 1)}
+
+    return summary
+
+
+class PooledSession(requests.Session):
+    """requests Session that applies a default timeout and records latency.
+
+    Requests that pass their own ``timeout`` keep it; all others get the
+    (connect, read) timeout the session was created with.
+    """
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        start = time.perf_counter()
+        try:
+            return super().request(method, url, **kwargs)
+        finally:
+            record_latency(urlparse(url).netloc, time.perf_counter() - start)
+
+
+def build_session(pool=pool_size, retries=max_retries,
+                  timeout=(connect_timeout, read_timeout)):
+    """Return a pooled keep-alive session for http and https requests.
+
+    Parameters
+    ----------
+    pool:       int
+        number of connections kept alive per host.
+
+    retries:    int
+        number of retries on connection errors and 429/5xx responses
+        for idempotent requests.
+
+    timeout:    float or tuple
+        default (connect, read) timeout in seconds for every request.
+
+    Returns
+    -------
+    PooledSession
+
+    Examples
+    --------
+    >>> build_session(pool=4, timeout=(3, 30))
+    """
+    retry = Retry(total=retries, backoff_factor=0.5,
+                  status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool,
+                          max_retries=retry)
+    pooled = PooledSession(timeout=timeout)
+    pooled.mount('https://', adapter)
+    pooled.mount('http://', adapter)
+
+    return pooled
+
+
+# single session shared by data_fetch and tweet_generate
+session = build_session()
+
+
+##################################################################
+                    # OFFLINE BENCHMARKING #
+##################################################################
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answer every request with a small json body over keep-alive."""
+    protocol_version = 'HTTP/1.1'
+    body = json.dumps({'media_id': 710511363345354753, 'size': 11065}).encode()
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubServer(object):
+    """Local stub HTTP server standing in for data.world and Twitter.
+
+    Parameters
+    ----------
+    handler:    BaseHTTPRequestHandler subclass, optional
+        request handler answering the requests (default answers every
+        request with the same small json body).
+
+    Examples
+    --------
+    >>> with StubServer() as url:
+    ...     session.get(url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, handler=None):
+        self.server = _ThreadingHTTPServer((host, port), handler or _StubHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(*self.server.server_address)
+
+    def __enter__(self):
+        self.thread.start()
+        return self.url
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def benchmark(num_requests=200):
+    """Compare fresh connections against the pooled session on a stub server.
+
+    Parameters
+    ----------
+    num_requests:   int
+        number of requests sent with each strategy.
+
+    Returns
+    -------
+    dict
+        total seconds taken by unpooled and pooled requests.
+
+    Examples
+    --------
+    >>> benchmark(num_requests=500)
+    """
+    results = {}
+    with StubServer() as url:
+        start = time.perf_counter()
+        for _ in range(num_requests):
+            with requests.Session() as fresh:
+                fresh.get(url, timeout=(connect_timeout, read_timeout))
+        results['unpooled_seconds'] = round(time.perf_counter() - start, 3)
+
+        pooled = build_session()
+        start = time.perf_counter()
+        for _ in range(num_requests):
+            pooled.get(url)
+        results['pooled_seconds'] = round(time.perf_counter() - start, 3)
+        pooled.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    print(benchmark())
+    print(latency_summary())
@@ -4,12 +4,20 @@ Date 3/4/2019
 """
 
 from configparser import ConfigParser
+from datetime import datetime
 import imghdr
+import json
+import mimetypes
 import os
 import sys
+import time
 
+import requests
 import tweepy
 
+from profiling import stage
+from transport import read_timeout, session
+
 config = ConfigParser()
 config.read(os.path.join(os.pardir,'configuration','config.ini'))
 
@@ -20,11 +28,110 @@ token_secret = config.get('token_secret', 'bpiocity_token_secret')
 # instantiate api object
 auth = tweepy.OAuthHandler(consumer_key=api_key, consumer_secret=api_secret)
 auth.set_access_token(key=access_token, secret=token_secret)
-api = tweepy.API(auth)
+api = tweepy.API(auth, timeout=read_timeout)
+
+# media uploads go through the shared pooled session from the transport module
+media_upload_url = 'https://upload.twitter.com/1.1/media/upload.json'
+chunk_bytes = 4 * 1024 * 1024  # twitter accepts APPEND segments up to 5MB
 
 # twitter geo-tagging parameters is ignored if (the default) geo_enabled is false
 abelwolman_location = {'latitude':39.291664, 'longitude':-76.610726}
 
+class FakeTweetSink(object):
+    """Local stand-in for the tweepy api object used for dry runs.
+
+    Tweets passed to ``tweet`` are appended as json lines to a file in the
+    sink folder instead of being uploaded and posted to Twitter.
+
+    Examples
+    --------
+    >>> sink = FakeTweetSink(folder='../data/archive')
+    >>> tweet(api_object=sink, files=['file1.png'], msg='dry run')
+    """
+
+    def __init__(self, folder=os.path.join(os.pardir,'data','dry_run')):
+        self.folder = folder
+        self.file = os.path.join(folder, 'tweets.jsonl')
+
+    def post(self, message, files):
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        with open(self.file, 'a') as f:
+            f.write(json.dumps({'posted': datetime.now().isoformat(),
+                                'status': message, 'media': list(files)}) + '\n')
+
+        return 'Post Successful.'
+
+
+def chunked_media_upload(tweepy_api, file, media_category):
+    """Upload a gif or video file with the Twitter 'chunked upload' endpoint.
+
+    The file is streamed in segments (INIT, APPEND, FINALIZE) over the shared
+    pooled session and the STATUS command is polled until Twitter has finished
+    processing the media.
+
+    Parameters
+    ----------
+    tweepy_api      : tweepy.api.API
+        A tweepy api object resulting from initializing, oauth with twitter api keys
+
+    file            : str
+        Name of the gif or mp4 file to upload.
+
+    media_category  : str
+        Twitter media category of the file, 'tweet_gif' or 'tweet_video'.
+
+    Returns
+    -------
+    dict
+        dict of the FINALIZE (or last STATUS) response including the
+        "media_id" and "size" of the uploaded file.
+
+    Examples
+    --------
+    >>> chunked_media_upload(tweepy_api=api, file='volume.gif',
+                             media_category='tweet_gif')
+    """
+    oauth = tweepy_api.auth.apply_auth()
+    init = session.post(media_upload_url, auth=oauth, data={
+        'command': 'INIT', 'total_bytes': os.path.getsize(file),
+        'media_type': mimetypes.guess_type(file)[0],
+        'media_category': media_category})
+    init.raise_for_status()
+    media_id = init.json()['media_id']
+
+    with open(file, 'rb') as media:
+        segment_index = 0
+        for chunk in iter(lambda: media.read(chunk_bytes), b''):
+            append = session.post(media_upload_url, auth=oauth,
+                                  data={'command': 'APPEND', 'media_id': media_id,
+                                        'segment_index': segment_index},
+                                  files={'media': chunk})
+            append.raise_for_status()
+            segment_index += 1
+
+    finalize = session.post(media_upload_url, auth=oauth,
+                            data={'command': 'FINALIZE', 'media_id': media_id})
+    finalize.raise_for_status()
+    media_info = finalize.json()
+
+    # videos and gifs are processed asynchronously by twitter
+    while media_info.get('processing_info', {}).get('state') in ('pending', 'in_progress'):
+        time.sleep(media_info['processing_info'].get('check_after_secs', 1))
+        status = session.get(media_upload_url, auth=oauth,
+                             params={'command': 'STATUS', 'media_id': media_id})
+        status.raise_for_status()
+        media_info = status.json()
+
+    if media_info.get('processing_info', {}).get('state') == 'failed':
+        raise requests.RequestException('media processing failed for {}: {}'.format(
+            file, media_info['processing_info'].get('error')))
+
+    media_info.setdefault('size', os.path.getsize(file))
+
+    return media_info
+
+
 def get_media_ids(tweepy_api, img_files):
     """Generate list of twitter media_ids for images to include in post method for tweets.
 
@@ -35,8 +142,8 @@ def get_media_ids(tweepy_api, img_files):
 
     img_files  : list
         List of image files to be included in tweet if tweet is to have
-        a picture associated with it. Files must be jpeg or png to comply with the
-        'simple image upload' method in the current Twitter API.
+        a picture associated with it. jpeg and png files are sent with the
+        'simple image upload' method, gif and mp4 files with 'chunked upload'.
 
     Returns
     -------
@@ -64,21 +171,38 @@ def get_media_ids(tweepy_api, img_files):
     #media_megabyte_limits = {'image':5,'GIF':15,'video':15}
     media_id_responses = {}
     errors = []
-    for file in img_files:
+    for idx, file in enumerate(img_files):
         # force compliance with twitter api by removing bad filetypes before request
         if imghdr.what(file) == 'jpeg' or imghdr.what(file) == 'png':
             try:
-                twitter_api_media_response = (tweepy_api.media_upload(
-                    filename = file,
-                    additional_owners = None))
+                with stage('upload_{}'.format(idx)), open(file, 'rb') as img:
+                    twitter_api_media_response = session.post(
+                        media_upload_url, files={'media': img},
+                        auth=tweepy_api.auth.apply_auth())
+                twitter_api_media_response.raise_for_status()
+                media_info = twitter_api_media_response.json()
 
                 # store media id and filetype in dictionary
                 media_id_responses[file] = {
-                    'media_id': twitter_api_media_response.media_id,
-                    'file_kilobytes': twitter_api_media_response.size}
+                    'media_id': media_info['media_id'],
+                    'file_kilobytes': media_info['size']}
+
+            except requests.RequestException as Re:
+                errors.append(Re)
+
+        elif imghdr.what(file) == 'gif' or file.endswith('.mp4'):
+            media_category = 'tweet_gif' if file.endswith('.gif') else 'tweet_video'
+            try:
+                with stage('upload_{}'.format(idx)):
+                    media_info = chunked_media_upload(tweepy_api=tweepy_api, file=file,
+                                                      media_category=media_category)
+                media_id_responses[file] = {
+                    'media_id': media_info['media_id'],
+                    'file_kilobytes': media_info['size'],
+                    'media_category': media_category}
 
-            except tweepy.TweepError as Te:
-                errors.append(Te)
+            except requests.RequestException as Re:
+                errors.append(Re)
 
     return (media_id_responses
             if len(media_id_responses) > 0
@@ -132,17 +256,23 @@ def post_tweet(tweepy_api, message, media_objects={}, latitude=39.291664,longitu
     """
 
     media_ids = []
+    animated_ids = []
 
     for val in media_objects.values():
         if len(media_objects) > 0:
             media_ids.append(val['media_id'])
+            if 'media_category' in val:
+                animated_ids.append(val['media_id'])
         else:
             pass
 
 
     # ensure compliance with current Twitter API media restrictions
     try:
-        if len(media_ids) > 4:
+        if len(animated_ids) > 0:
+            # a gif or video can not be combined with other media
+            media_ids = animated_ids[:1]
+        elif len(media_ids) > 4:
             # okay now but must refactor for future if 'chunked media upload' with mix of filetypes
             media_ids = media_ids[:4]
     except Exception as e:
@@ -172,9 +302,9 @@ def tweet(api_object, files, msg=None):
 
     Parameters
     ----------
-    api_object : tweepy.api.API
+    api_object : tweepy.api.API or FakeTweetSink
         A tweepy api object resulting from initializing oauth with Twitter
-        api keys
+        api keys, or a FakeTweetSink to record the tweet locally (dry run)
 
     files      : list
         List of image files. The function forces compliance with the Twitter
@@ -200,6 +330,9 @@ def tweet(api_object, files, msg=None):
 
     """
 
+    if isinstance(api_object, FakeTweetSink):
+        return api_object.post(message=msg, files=files)
+
     media_ids = (get_media_ids(
         tweepy_api=api_object, img_files=files))
 
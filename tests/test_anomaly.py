@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from anomaly import SpikeDetector, spike_message, update_detector, weekly_count_matrix
+import numpy as np
+import pandas as pd
+
+
+class TestSpikeDetector(unittest.TestCase):
+    def setUp(self):
+        self.counts = np.tile([[18., 22., 20., 19.], [22., 18., 20., 21.]], (15, 1))
+        self.counts[-1, 2] = 80
+        self.weeks = pd.period_range('2018-01-01', periods=30, freq='W')
+        self.prob_types = pd.Index(['ELECTRICAL', 'HVAC', 'PLUMBING', 'ROOF'])
+
+    def test_weekly_count_matrix_shape(self):
+        frame = pd.DataFrame({'prob_type': ['HVAC', 'HVAC', 'ROOF']},
+                             index=pd.to_datetime(['2018-01-01', '2018-01-02',
+                                                   '2018-01-16']))
+        counts, weeks, prob_types = weekly_count_matrix(frame, through='2018-02-01')
+        self.assertEqual(counts.shape, (len(weeks), 2))
+        self.assertEqual(counts[0].tolist(), [2, 0])
+        self.assertEqual(counts.sum(), 3)
+
+    def test_weekly_count_matrix_null_prob_type(self):
+        frame = pd.DataFrame({'prob_type': [None, 'HVAC', None]},
+                             index=pd.to_datetime(['2018-01-01', '2018-01-02',
+                                                   '2018-01-16']))
+        counts, weeks, prob_types = weekly_count_matrix(frame, through='2018-02-01')
+        self.assertEqual(prob_types.tolist(), ['HVAC', 'NONE'])
+        self.assertEqual(counts[0].tolist(), [1, 1])
+        self.assertEqual(counts[:, 1].sum(), 2)
+
+    def test_spike_flagged(self):
+        detector = SpikeDetector(self.counts, self.weeks, self.prob_types)
+        self.assertEqual(detector.spikes()['prob_type'].tolist(), ['PLUMBING'])
+
+    def test_append_week_matches_full_zscores(self):
+        detector = SpikeDetector(self.counts[:-1], self.weeks[:-1], self.prob_types)
+        scores = detector.append_week(pd.Series(self.counts[-1], index=self.prob_types))
+        np.testing.assert_allclose(scores.values, detector.zscores()[-1])
+
+    def test_none_never_flagged(self):
+        prob_types = pd.Index(['ELECTRICAL', 'HVAC', 'NONE', 'ROOF'])
+        detector = SpikeDetector(self.counts, self.weeks, prob_types)
+        self.assertEqual(len(detector.spikes()), 0)
+        self.assertIsNone(spike_message(detector.spikes()))
+
+    def test_weekly_count_matrix_without_complete_weeks(self):
+        frame = pd.DataFrame({'prob_type': ['HVAC']},
+                             index=pd.to_datetime(['2018-01-03']))
+        counts, weeks, prob_types = weekly_count_matrix(frame, through='2018-01-04')
+        self.assertEqual(counts.shape, (0, 0))
+        self.assertEqual(len(weeks), 0)
+        self.assertEqual(len(SpikeDetector(counts, weeks, prob_types).spikes()), 0)
+
+    def test_update_detector_appends_new_weeks(self):
+        rng = np.random.RandomState(0)
+        index = pd.DatetimeIndex(sorted(pd.Timestamp('2018-01-01') +
+                                        pd.to_timedelta(rng.randint(0, 120, 3000), unit='D')))
+        frame = pd.DataFrame({'prob_type': rng.choice(['HVAC', 'ROOF', None], 3000)},
+                             index=index)
+        with tempfile.TemporaryDirectory() as folder:
+            file = os.path.join(folder, 'weekly_counts.pkl')
+            update_detector(frame[frame.index < '2018-03-01'], file=file, through='2018-03-01')
+            detector = update_detector(frame, file=file, through='2018-04-20')
+
+        counts, weeks, prob_types = weekly_count_matrix(frame, through='2018-04-20')
+        self.assertTrue(detector.weeks.equals(weeks))
+        np.testing.assert_array_equal(
+            pd.DataFrame(detector.counts, columns=detector.prob_types)[prob_types].values,
+            counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from backfill import weekly_table, week_charts
+from rollup import RollupStore
+import numpy as np
+import pandas as pd
+
+
+class TestBackfillAggregation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        index = pd.DatetimeIndex(sorted(pd.Timestamp('2015-01-01') +
+                                        pd.to_timedelta(rng.randint(0, 900, 5000), unit='D')))
+        self.frame = pd.DataFrame({'wo_id': [str(i) for i in range(5000)],
+                                   'prob_type': rng.choice(['HVAC', 'OTHER', 'ROOF'], 5000)},
+                                  index=index)
+        self.frame['year'] = self.frame.index.year
+        self.period = pd.Period('2016-03-06', freq='W')
+
+    def test_weekly_table_keeps_every_request(self):
+        self.assertEqual(weekly_table(self.frame)['requests'].sum(), 5000)
+
+    def test_yearoveryear_counts_match_as_of_filter(self):
+        tasks = week_charts(weekly_table(self.frame), self.period, folder='unused')
+        known = self.frame[self.frame.index <= self.period.end_time]
+        current = known[known['year'] == 2016]
+        expected = current.groupby(current.index.isocalendar().week.values)['wo_id'].count()
+        self.assertEqual(tasks[0][1]['current_year_data'].tolist(), expected.tolist())
+
+    def test_donut_leaves_out_other(self):
+        tasks = week_charts(weekly_table(self.frame), self.period, folder='unused')
+        self.assertNotIn('OTHER', list(tasks[1][1]['labels']))
+
+    def test_rollup_table_matches_frame_with_null_prob_types(self):
+        frame = self.frame.assign(bl_id='B01', work_team_id='T1', duration=1.)
+        frame.iloc[::7, frame.columns.get_loc('prob_type')] = None
+        store = RollupStore()
+        store.apply(frame)
+        from_frame = week_charts(weekly_table(frame), self.period, folder='unused')
+        from_rollup = week_charts(weekly_table(store), self.period, folder='unused')
+        self.assertEqual(from_frame[0][1]['current_year_data'].tolist(),
+                         from_rollup[0][1]['current_year_data'].tolist())
+        self.assertEqual(list(from_frame[1][1]['labels']), list(from_rollup[1][1]['labels']))
+        self.assertNotIn('NONE', list(from_rollup[1][1]['labels']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from backlog import BacklogEngine
+import pandas as pd
+
+
+class TestBacklogEngine(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame(
+            {'wo_id': ['1', '2', '3'],
+             'prob_type': ['HVAC', 'HVAC', 'ROOF'],
+             'completed': pd.to_datetime(['2018-01-03', None, '2018-01-02']),
+             'closed': pd.to_datetime(['2018-01-04', None, None])},
+            index=pd.to_datetime(['2018-01-01', '2018-01-02', '2018-01-02 15:00']))
+        self.engine = BacklogEngine(origin='2018-01-01')
+        self.engine.apply(self.frame)
+
+    def test_open_per_day(self):
+        backlog = self.engine.series(end='2018-01-04')
+        self.assertEqual(backlog['HVAC'].tolist(), [1, 2, 1, 1])
+        self.assertEqual(backlog['ROOF'].tolist(), [0, 0, 0, 0])
+
+    def test_close_moves_event(self):
+        self.engine.close(['2'], ['2018-01-04'])
+        self.assertEqual(self.engine.series(end='2018-01-05')['HVAC'].tolist(),
+                         [1, 2, 1, 0, 0])
+
+    def test_changed_rows(self):
+        reopened = self.frame.copy()
+        reopened.loc[reopened['wo_id'] == '1', ['completed', 'closed']] = pd.NaT
+        self.assertEqual(self.engine.changed(reopened)['wo_id'].tolist(), ['1'])
+
+    def test_future_dates_clipped(self):
+        typo = self.frame.copy()
+        typo['completed'] = pd.to_datetime(['2018-01-03', '2219-01-02', '2018-01-02'])
+        self.engine.apply(self.engine.changed(typo))
+        days = (pd.Timestamp.today().normalize() - pd.Timestamp('2018-01-01')).days
+        self.assertLessEqual(self.engine.deltas.shape[0], days + 2)
+        self.assertEqual(self.engine.series().index[-1], pd.Timestamp.today().normalize())
+        self.assertEqual(self.engine.series()['HVAC'].iloc[-1], 1)
+        self.assertEqual(len(self.engine.changed(typo)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
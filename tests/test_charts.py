@@ -1,7 +1,17 @@
 from  configparser import ConfigParser
 import os
+import shutil
+import stat
+import tempfile
 import unittest
 
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from chart_generate import animated_yearoveryear_volume
+
 
 class TestChartImageFileGenerator(unittest.TestCase):
     def put_future_tests_here():
@@ -11,5 +21,32 @@ class TestChartImageFileGenerator(unittest.TestCase):
         pass
 
 
+class TestAnimatedYearOverYear(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        index = pd.date_range('2017-01-01', '2018-06-30', freq='D')
+        self.frame = pd.DataFrame({'wo_id': [str(i) for i in range(len(index))]},
+                                  index=index)
+        self.frame['year'] = self.frame.index.year
+        self.ffmpeg_path = plt.rcParams['animation.ffmpeg_path']
+
+    def tearDown(self):
+        plt.rcParams['animation.ffmpeg_path'] = self.ffmpeg_path
+        shutil.rmtree(self.folder)
+
+    def test_encoder_exiting_early_returns_none(self):
+        # stands in for ffmpeg failing before reading the frames
+        encoder = os.path.join(self.folder, 'ffmpeg')
+        with open(encoder, 'w') as f:
+            f.write('#!/bin/sh\nexit 1\n')
+        os.chmod(encoder, os.stat(encoder).st_mode | stat.S_IEXEC)
+        plt.rcParams['animation.ffmpeg_path'] = encoder
+
+        fname = animated_yearoveryear_volume(self.frame, as_of=pd.Timestamp('2018-06-30'),
+                                             folder=os.path.join(self.folder, 'images'))
+        self.assertIsNone(fname)
+        self.assertEqual(os.listdir(os.path.join(self.folder, 'images')), [])
+
+
 if __name__ == '__main__':
     unittest.main()
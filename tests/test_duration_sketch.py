@@ -0,0 +1,69 @@
+import unittest
+
+from duration_sketch import DurationSketch
+import numpy as np
+import pandas as pd
+
+
+class TestDurationSketch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.frame = pd.DataFrame(
+            {'wo_id': [str(i) for i in range(5000)],
+             'prob_type': rng.choice(['HVAC', 'PLUMBING'], 5000),
+             'duration': rng.exponential(10, 5000).astype(int)},
+            index=pd.date_range('2018-01-01', periods=5000, freq='h'))
+        self.frame['completed'] = self.frame.index + pd.to_timedelta(self.frame['duration'],
+                                                                     unit='D')
+
+    def test_quantiles_within_accuracy(self):
+        sketch = DurationSketch(by=['prob_type'])
+        sketch.update(self.frame)
+        exact = self.frame.groupby('prob_type')['duration'].quantile(.9)
+        approx = sketch.quantiles(q=(.9,))['p90']
+        for prob_type in exact.index:
+            self.assertAlmostEqual(approx[(prob_type,)], exact[prob_type],
+                                   delta=exact[prob_type] * .05 + 1)
+
+    def test_quantiles_of_recent_weeks(self):
+        sketch = DurationSketch(by=['prob_type'])
+        sketch.update(self.frame)
+        recent = self.frame[self.frame['completed'] >= '2018-06-04']
+        self.assertEqual(sketch.quantiles(start='2018-06-04')['count'].sum(), len(recent))
+
+    def test_recompleted_work_order_counted_once(self):
+        sketch = DurationSketch(by=['prob_type'])
+        sketch.update(self.frame)
+        # work orders reopened and completed again 40 and 250 days after request
+        reclosed = self.frame.copy()
+        for row, days in [(-1, 40), (0, 250)]:
+            reclosed.iloc[row, reclosed.columns.get_loc('duration')] = days
+            reclosed.iloc[row, reclosed.columns.get_loc('completed')] = (
+                reclosed.index[row] + pd.Timedelta(days=days))
+        self.assertEqual(sketch.update(reclosed), 2)
+
+        rebuilt = DurationSketch(by=['prob_type'])
+        rebuilt.update(reclosed)
+        self.assertEqual(sketch.quantiles()['count'].sum(), 5000)
+        pd.testing.assert_frame_equal(sketch.quantiles(q=(.5, 1)), rebuilt.quantiles(q=(.5, 1)))
+
+    def test_reopened_work_order_taken_out(self):
+        sketch = DurationSketch(by=['prob_type'])
+        sketch.update(self.frame)
+        reopened = self.frame.copy()
+        reopened.iloc[:10, reopened.columns.get_loc('completed')] = pd.NaT
+        reopened.iloc[:10, reopened.columns.get_loc('duration')] = np.nan
+        sketch.update(reopened)
+        self.assertEqual(sketch.quantiles()['count'].sum(), 4990)
+
+    def test_merge_matches_single_update(self):
+        whole, first, second = (DurationSketch(by=['prob_type']) for _ in range(3))
+        whole.update(self.frame)
+        first.update(self.frame.iloc[::2])
+        second.update(self.frame.iloc[1::2])
+        pd.testing.assert_frame_equal(first.merge(second).quantiles(),
+                                      whole.quantiles())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+import transport
+from dw_query import query_table
+
+
+class CsvHandler(transport._StubHandler):
+    """Answer SQL API queries with a csv body like api.data.world."""
+    requests = []
+    body = b'wo_id,prob_type,bl_id\n1043,HVAC,B001\n1044,PLUMBING,B002\n'
+
+    def _respond(self):
+        self.requests.append({'query': parse_qs(urlparse(self.path).query)['query'][0],
+                              'auth': self.headers.get('Authorization'),
+                              'accept': self.headers.get('Accept')})
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    do_GET = _respond
+
+
+class TestQueryTable(unittest.TestCase):
+    def setUp(self):
+        CsvHandler.requests = []
+
+    def test_query_over_stub(self):
+        with transport.StubServer(handler=CsvHandler) as url:
+            data = query_table(key='org/dataset', data_name='work orders', token='secret',
+                               url=url + 'v0/sql/{}')
+        self.assertEqual(CsvHandler.requests, [{'query': 'SELECT * FROM `work orders`',
+                                                'auth': 'Bearer secret',
+                                                'accept': 'text/csv'}])
+        self.assertEqual(data['prob_type'].tolist(), ['HVAC', 'PLUMBING'])
+
+    def test_work_order_ids_keep_client_download_form(self):
+        with transport.StubServer(handler=CsvHandler) as url:
+            data = query_table(key='org/dataset', data_name='work_orders', token='secret',
+                               url=url + 'v0/sql/{}')
+        # clean_data converts ids with astype(str) as it did for the client download
+        self.assertEqual(data['wo_id'].astype(str).tolist(), ['1043.0', '1044.0'])
+
+    def test_table_name_quoted(self):
+        with transport.StubServer(handler=CsvHandler) as url:
+            query_table(key='org/dataset', data_name='a`; DROP', token='secret',
+                        url=url + 'v0/sql/{}')
+        self.assertEqual(CsvHandler.requests[0]['query'], 'SELECT * FROM `a``; DROP`')
+
+
+if __name__ == '__main__':
+    unittest.main()
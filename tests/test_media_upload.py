@@ -0,0 +1,78 @@
+import json
+import os
+import re
+import tempfile
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+import transport
+import tweet_generate
+
+
+class TwitterUploadHandler(transport._StubHandler):
+    """Answer the chunked upload commands like upload.twitter.com."""
+    commands = []
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = self.rfile.read(length) if length else b''
+        # INIT/FINALIZE are form encoded, APPEND multipart and STATUS a query
+        match = re.search(rb'name="command"\r\n\r\n(\w+)', payload)
+        fields = parse_qs(urlparse(self.path).query) or parse_qs(payload.decode('latin-1'))
+        command = match.group(1).decode() if match else fields['command'][0]
+        self.commands.append(command)
+
+        body = {'media_id': 710511363345354753}
+        if command == 'FINALIZE':
+            body['processing_info'] = {'state': 'pending', 'check_after_secs': 0}
+        elif command == 'STATUS':
+            body['processing_info'] = {'state': 'succeeded'}
+        body = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+
+class FakeAuth(object):
+    def apply_auth(self):
+        return None
+
+
+class FakeApi(object):
+    auth = FakeAuth()
+
+
+class TestChunkedMediaUpload(unittest.TestCase):
+    def setUp(self):
+        TwitterUploadHandler.commands = []
+        self.folder = tempfile.mkdtemp()
+        self.file = os.path.join(self.folder, 'volume.gif')
+        with open(self.file, 'wb') as f:
+            f.write(b'GIF89a' + b'\x00' * 2500)
+        self.url, self.chunk_bytes = tweet_generate.media_upload_url, tweet_generate.chunk_bytes
+        tweet_generate.chunk_bytes = 1024
+
+    def tearDown(self):
+        tweet_generate.media_upload_url = self.url
+        tweet_generate.chunk_bytes = self.chunk_bytes
+        os.remove(self.file)
+        os.rmdir(self.folder)
+
+    def test_init_append_finalize_status(self):
+        with transport.StubServer(handler=TwitterUploadHandler) as url:
+            tweet_generate.media_upload_url = url
+            media_info = tweet_generate.chunked_media_upload(FakeApi(), self.file,
+                                                             media_category='tweet_gif')
+        self.assertEqual(TwitterUploadHandler.commands,
+                         ['INIT', 'APPEND', 'APPEND', 'APPEND', 'FINALIZE', 'STATUS'])
+        self.assertEqual(media_info['media_id'], 710511363345354753)
+        self.assertEqual(media_info['size'], 2506)
+
+
+if __name__ == '__main__':
+    unittest.main()
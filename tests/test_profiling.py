@@ -0,0 +1,49 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+import profiling
+
+
+class TestStageProfiling(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.enabled, self.run_folder = profiling.enabled, profiling.run_folder
+        profiling.enabled = True
+
+    def tearDown(self):
+        profiling.enabled, profiling.run_folder = self.enabled, self.run_folder
+        shutil.rmtree(self.folder)
+
+    def profile_run(self, name, size):
+        profiling.run_folder = os.path.join(self.folder, name)
+        with profiling.stage('build'):
+            held = bytearray(size)
+        with profiling.stage('sum'):
+            sum(range(10000))
+        return held
+
+    def test_peak_is_relative_to_stage_start(self):
+        held = self.profile_run('a', 4 * 1024 * 1024)
+        run = profiling.load_run(os.path.join(self.folder, 'a'))
+        self.assertGreaterEqual(run['build']['peak_kb'], 4096)
+        # memory still held from the build stage isn't counted again
+        self.assertLess(run['sum']['peak_kb'], 1024)
+        del held
+
+    def test_diff_runs(self):
+        self.profile_run('a', 1024 * 1024)
+        self.profile_run('b', 3 * 1024 * 1024)
+        report = profiling.diff_runs(os.path.join(self.folder, 'a'),
+                                     os.path.join(self.folder, 'b'))
+        lines = report.splitlines()
+        self.assertTrue(lines[0].startswith('build: '))
+        peak_change = int(re.search(r'\(([+-]\d+)KB\)', lines[0]).group(1))
+        self.assertAlmostEqual(peak_change, 2048, delta=64)
+        self.assertTrue(any(line.startswith('sum: ') for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
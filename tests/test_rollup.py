@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from rollup import RollupStore, update_rollup
+import numpy as np
+import pandas as pd
+
+
+class TestRollupStore(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.frame = pd.DataFrame(
+            {'wo_id': [str(i) for i in range(2000)],
+             'prob_type': rng.choice(['HVAC', 'PLUMBING'], 2000),
+             'bl_id': rng.choice(['B01', 'B02', None], 2000),
+             'work_team_id': rng.choice(['T1', 'T2'], 2000),
+             'duration': rng.randint(0, 40, 2000).astype(float)},
+            index=pd.date_range('2018-01-01', periods=2000, freq='6H'))
+        self.frame['year'] = self.frame.index.year
+
+    def test_deltas_match_full_rebuild(self):
+        store = RollupStore()
+        store.apply(self.frame.iloc[:1500])
+
+        changed = self.frame.copy()
+        changed.iloc[:100, changed.columns.get_loc('duration')] = np.nan  # reopened
+        changed.iloc[100:200, changed.columns.get_loc('prob_type')] = 'ROOF'
+        self.assertEqual(len(store.changed(changed)), 700)
+        store.apply(store.changed(changed))
+
+        rebuilt = RollupStore()
+        rebuilt.apply(changed)
+        pd.testing.assert_frame_equal(store.table(by=['year', 'prob_type', 'bl_id']),
+                                      rebuilt.table(by=['year', 'prob_type', 'bl_id']))
+
+    def test_remove_work_orders(self):
+        store = RollupStore()
+        store.apply(self.frame)
+        store.remove(self.frame['wo_id'][:10])
+        self.assertEqual(store.table(by=['year'])['requests'].sum(), 1990)
+
+    def test_incremental_update_applies_rows_directly(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file = os.path.join(folder, 'rollup.pkl')
+            update_rollup(self.frame.iloc[:1500], file=file)
+            store = update_rollup(self.frame.iloc[1500:], file=file, full=False)
+        table = store.table(by=['year'])
+        self.assertEqual(table['requests'].sum(), 2000)
+        self.assertEqual(table['requests'].dtype, np.int64)
+
+
+if __name__ == '__main__':
+    unittest.main()
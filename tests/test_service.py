@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import service
+from backlog import BacklogEngine
+from rollup import RollupStore
+import pandas as pd
+
+
+class TestStatsService(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        frame = pd.DataFrame(
+            {'wo_id': ['1', '2', '3'],
+             'prob_type': ['HVAC', 'HVAC', 'ROOF'],
+             'bl_id': ['B01', 'B02', 'B01'],
+             'work_team_id': ['T1', 'T1', 'T2'],
+             'duration': [2., None, 5.],
+             'completed': pd.to_datetime(['2018-01-03', None, '2018-01-07']),
+             'closed': pd.to_datetime([None, None, None])},
+            index=pd.to_datetime(['2018-01-01', '2018-01-02', '2018-01-02']))
+        frame['year'] = frame.index.year
+        files = [os.path.join(self.folder, name) for name in
+                 ['rollup.pkl', 'sketch.pkl', 'backlog.pkl']]
+        rollup = RollupStore()
+        rollup.apply(frame)
+        rollup.save(file=files[0])
+        backlog = BacklogEngine(origin='2018-01-01')
+        backlog.apply(frame)
+        backlog.save(file=files[2])
+
+        service.store = service.DataStore(*files)
+        self.chart_folder = service.chart_folder
+        service.chart_folder = os.path.join(self.folder, 'charts')
+        self.server = service.StatsServer(('127.0.0.1', 0), service.StatsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        service.chart_folder = self.chart_folder
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.folder)
+
+    def test_weekly_stats(self):
+        with urlopen(self.url + '/stats/weekly?by=prob_type') as response:
+            body = response.read().decode()
+        self.assertIn('"prob_type":"HVAC","requests":2', body)
+
+    def test_etag_revalidation(self):
+        with urlopen(self.url + '/stats/backlog?end=2018-01-03') as response:
+            etag = response.headers['ETag']
+        request = Request(self.url + '/stats/backlog?end=2018-01-03',
+                          headers={'If-None-Match': etag})
+        with self.assertRaises(HTTPError) as context:
+            urlopen(request)
+        self.assertEqual(context.exception.code, 304)
+
+    def test_etag_changes_with_data(self):
+        with urlopen(self.url + '/stats/weekly') as response:
+            etag = response.headers['ETag']
+        rollup_file = service.store.files[0]
+        os.utime(rollup_file, (0, os.path.getmtime(rollup_file) + 10))
+        with urlopen(self.url + '/stats/weekly') as response:
+            self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_backlog_chart_png(self):
+        with urlopen(self.url + '/charts/backlog.png?topn=2') as response:
+            self.assertEqual(response.headers['Content-Type'], 'image/png')
+            self.assertTrue(response.read().startswith(b'\x89PNG'))
+        self.assertEqual(os.listdir(service.chart_folder), [])
+
+    def test_render_error_returns_json(self):
+        os.remove(service.store.files[2])  # empty backlog store
+        with self.assertRaises(HTTPError) as context:
+            urlopen(self.url + '/charts/backlog.png')
+        self.assertEqual(context.exception.code, 500)
+        self.assertIn('error', json.loads(context.exception.read().decode()))
+
+    def test_unknown_parameters_share_cache_entry(self):
+        etags = []
+        for stamp in range(3):
+            with urlopen(self.url + '/stats/weekly?_={}'.format(stamp)) as response:
+                etags.append(response.headers['ETag'])
+        self.assertEqual(len(set(etags)), 1)
+        self.assertEqual(len(service.store.cache), 1)
+
+    def test_cache_keeps_most_recent_entries(self):
+        service.store.max_entries = 3
+        days = pd.date_range('2018-01-01', periods=5).strftime('%Y-%m-%d')
+        for day in days:
+            urlopen(self.url + '/stats/backlog?start={}'.format(day)).close()
+        self.assertEqual(list(service.store.cache),
+                         ['/stats/backlog?start={}'.format(day) for day in days[-3:]])
+
+    def test_slow_render_does_not_block_other_keys(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return b'slow'
+
+        worker = threading.Thread(target=service.store.cached, args=('slow', slow))
+        worker.start()
+        started.wait(5)
+        with urlopen(self.url + '/stats/weekly', timeout=2) as response:
+            self.assertEqual(response.status, 200)
+        release.set()
+        worker.join()
+        self.assertEqual(service.store.cached('slow', lambda: b'again')[1], b'slow')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from spatial import BuildingIndex, hotspots
+import pandas as pd
+
+
+class TestBuildingIndex(unittest.TestCase):
+    def setUp(self):
+        # buildings ~111m apart along a meridian
+        self.buildings = pd.DataFrame({'bl_id': ['B0', 'B1', 'B2', 'B3'],
+                                       'latitude': [39.290, 39.291, 39.292, 39.300],
+                                       'longitude': [-76.61] * 4})
+        self.index = BuildingIndex(self.buildings)
+
+    def test_within_radius(self):
+        self.assertEqual(self.index.within('B0', radius_m=150)['bl_id'].tolist(),
+                         ['B0', 'B1'])
+
+    def test_nearest_distance(self):
+        nearest = self.index.nearest(39.291, -76.61, k=2)
+        self.assertEqual(nearest['bl_id'].iloc[0], 'B1')
+        self.assertAlmostEqual(nearest['distance_m'].iloc[1], 111.2, delta=1)
+
+    def test_neighborhoods_include_self(self):
+        neighborhoods = self.index.neighborhoods(radius_m=150).toarray()
+        self.assertEqual(neighborhoods.diagonal().tolist(), [1, 1, 1, 1])
+        self.assertEqual(neighborhoods.sum(axis=1).tolist(), [2, 3, 2, 1])
+
+    def test_hotspot_cluster_flagged_once(self):
+        # quiet weeks, then 10 HVAC requests across B0-B2 in the week of 2018-03-05
+        quiet = pd.date_range('2018-01-01', periods=9, freq='W-MON')
+        # plus 12 requests without a problem type at B3, which are never flagged
+        spike = pd.to_datetime(['2018-03-06'] * 22)
+        frame = pd.DataFrame(
+            {'prob_type': ['HVAC'] * 9 + [None] * 9 + ['HVAC'] * 10 + [None] * 12,
+             'bl_id': ['B3'] * 9 + ['B0'] * 9 + ['B1'] * 6 + ['B2'] * 3 + ['B0'] + ['B3'] * 12},
+            index=quiet.append(quiet).append(spike))
+        spots = hotspots(frame, self.index, radius_m=150, through='2018-03-15')
+        self.assertEqual(spots['bl_id'].tolist(), ['B1'])
+        self.assertEqual(spots['prob_type'].tolist(), ['HVAC'])
+        self.assertEqual(spots[['requests', 'buildings']].values.tolist(), [[10, 3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+from transport import StubServer, build_session, latency_summary, metrics
+
+
+class TestPooledTransport(unittest.TestCase):
+    def setUp(self):
+        self.session = build_session(pool=2, timeout=(1, 1))
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_stub_server_response(self):
+        with StubServer() as url:
+            response = self.session.get(url)
+        self.assertEqual(response.json()['size'], 11065)
+
+    def test_latency_recorded_per_host(self):
+        with StubServer() as url:
+            for _ in range(3):
+                self.session.post(url, data=b'chunk')
+            host = url.split('/')[2]
+        self.assertGreaterEqual(len(metrics[host]), 3)
+        self.assertIn(host, latency_summary())
+
+
+if __name__ == '__main__':
+    unittest.main()